@@ -175,7 +175,7 @@ class DijkstraController(app_manager.RyuApp):
         dpid = datapath.id
         
         pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        eth_pkt = pkt.get_protocol(ethernet.ethernet)
         
         # Ignore LLDP
         if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
@@ -250,7 +250,7 @@ class DijkstraController10(app_manager.RyuApp):
         dpid = datapath.id
         
         pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        eth_pkt = pkt.get_protocol(ethernet.ethernet)
         
         if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
             return
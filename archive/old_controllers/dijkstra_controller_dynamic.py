@@ -226,7 +226,7 @@ class DijkstraControllerDynamic(app_manager.RyuApp):
         
         # Parse packet
         pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        eth = pkt.get_protocol(ethernet.ethernet)
         
         # Ignore LLDP packets (handled by topology discovery)
         if eth.ethertype == ether_types.ETH_TYPE_LLDP:
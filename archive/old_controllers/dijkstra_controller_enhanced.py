@@ -205,7 +205,7 @@ class DijkstraControllerEnhanced(app_manager.RyuApp):
         
         # Parse packet
         pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        eth = pkt.get_protocol(ethernet.ethernet)
         
         # Ignore LLDP and IPv6
         if eth.ethertype == ether_types.ETH_TYPE_LLDP:
@@ -212,7 +212,7 @@ class DijkstraControllerFinal(app_manager.RyuApp):
         
         # Parse packet
         pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        eth = pkt.get_protocol(ethernet.ethernet)
         
         # Ignore LLDP
         if eth.ethertype == ether_types.ETH_TYPE_LLDP:
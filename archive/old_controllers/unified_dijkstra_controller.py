@@ -9,34 +9,54 @@ from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
 from ryu.lib.packet import packet, ethernet, ether_types
+from ryu.lib import addrconv
 import networkx as nx
 import logging
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+import struct
 import sys
+import time
 import os
 
 # Add parent directory to path to import topology_config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from topology_config import get_topology_links, TOPOLOGY_DIAGRAM
 
+# Configure logging once at import time rather than per controller instance
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)8s] %(message)s',
+    datefmt='%H:%M:%S'
+)
+
+# Placeholder values used to locate patchable fields in the path FlowMod template
+TEMPLATE_DST_MAC = '02:00:00:00:fd:01'
+TEMPLATE_SRC_MAC = '02:00:00:00:fd:02'
+TEMPLATE_OUT_PORT = 0x0badcafe
+
+# Timeouts of the flows this controller installs (seconds)
+FLOW_IDLE_TIMEOUT = 30
+FLOW_HARD_TIMEOUT = 60
+
 class UnifiedDijkstraController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
 
     def __init__(self, *args, **kwargs):
         super(UnifiedDijkstraController, self).__init__(*args, **kwargs)
-        self.mac_to_port = {}
+        self.mac_to_port = {}  # dpid -> {mac_bytes -> port}
         self.datapaths = {}
-        self.mac_to_dpid = {}
+        self.mac_to_dpid = {}  # mac_bytes -> dpid
         self.topology = nx.Graph()
         self.switch_ports = defaultdict(dict)
+        self.port_to_neighbor = defaultdict(dict)  # dpid -> {port -> neighbor_dpid}
         self.path_count = 0
-        
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s [%(levelname)8s] %(message)s',
-            datefmt='%H:%M:%S'
-        )
+        self._port_cache = {}  # (sw_a, sw_b) -> port, cleared on topology change
+        self._action_cache = {}  # (dpid, port) -> [OFPActionOutput]
+        self._flow_templates = {}  # dpid -> (buf, dst_off, src_off, port_off)
+        self._send_batch = None  # dpid -> bytearray while a batch is open
+        # (src_mac, dst_mac) -> {dpid: (next_dpid, expires)}, least recently installed first
+        self.installed_paths = OrderedDict()
+        self.edge_to_pairs = defaultdict(set)  # (sw_a, sw_b) -> {(src_mac, dst_mac)}
         
         self.logger.info("="*70)
         self.logger.info("   UNIFIED DIJKSTRA CONTROLLER STARTED")
@@ -58,19 +78,23 @@ class UnifiedDijkstraController(app_manager.RyuApp):
             self.topology.add_edge(sw1, sw2, weight=1)
             self.switch_ports[sw1][sw2] = port1
             self.switch_ports[sw2][sw1] = port2
-            self.logger.info(f"  ➕ Added link: s{sw1}:{port1} <--> s{sw2}:{port2}")
+            self.port_to_neighbor[sw1][port1] = sw2
+            self.port_to_neighbor[sw2][port2] = sw1
+        self.logger.info("  ➕ Added %d links from config", len(links))
         
         # Print summary
         self.logger.info(f"\n📊 TOPOLOGY SUMMARY:")
         self.logger.info(f"  • Switches: {self.topology.number_of_nodes()}")
         self.logger.info(f"  • Links: {self.topology.number_of_edges()}")
         
-        # Show connectivity for each switch
-        self.logger.info(f"\n🔗 SWITCH CONNECTIVITY:")
-        for node in sorted(self.topology.nodes()):
-            neighbors = sorted(list(self.topology.neighbors(node)))
-            ports = [f"s{n}(p{self.switch_ports[node][n]})" for n in neighbors]
-            self.logger.info(f"  s{node} -> {', '.join(ports)}")
+        # Show connectivity for each switch (skip the sorting/formatting
+        # entirely when nobody will read it)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"\n🔗 SWITCH CONNECTIVITY:")
+            for node in sorted(self.topology.nodes()):
+                neighbors = sorted(self.topology.neighbors(node))
+                ports = [f"s{n}(p{self.switch_ports[node][n]})" for n in neighbors]
+                self.logger.info(f"  s{node} -> {', '.join(ports)}")
 
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
@@ -104,41 +128,134 @@ class UnifiedDijkstraController(app_manager.RyuApp):
         if buffer_id:
             mod = parser.OFPFlowMod(datapath=datapath, buffer_id=buffer_id,
                                   priority=priority, match=match,
-                                  instructions=inst, idle_timeout=30, hard_timeout=60)
+                                  instructions=inst, idle_timeout=FLOW_IDLE_TIMEOUT, hard_timeout=FLOW_HARD_TIMEOUT)
         else:
             mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
                                   match=match, instructions=inst,
-                                  idle_timeout=30, hard_timeout=60)
+                                  idle_timeout=FLOW_IDLE_TIMEOUT, hard_timeout=FLOW_HARD_TIMEOUT)
         datapath.send_msg(mod)
 
+    def _path_flow_template(self, datapath):
+        """Serialize the path FlowMod once and record its patchable offsets"""
+        template = self._flow_templates.get(datapath.id)
+        if template is None:
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
+            match = parser.OFPMatch(eth_dst=TEMPLATE_DST_MAC, eth_src=TEMPLATE_SRC_MAC)
+            actions = [parser.OFPActionOutput(TEMPLATE_OUT_PORT)]
+            inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+            mod = parser.OFPFlowMod(datapath=datapath, priority=10,
+                                  match=match, instructions=inst,
+                                  idle_timeout=FLOW_IDLE_TIMEOUT, hard_timeout=FLOW_HARD_TIMEOUT)
+            mod.serialize()
+            buf = bytes(mod.buf)
+            template = (
+                buf,
+                buf.index(addrconv.mac.text_to_bin(TEMPLATE_DST_MAC)),
+                buf.index(addrconv.mac.text_to_bin(TEMPLATE_SRC_MAC)),
+                buf.index(struct.pack('!I', TEMPLATE_OUT_PORT)),
+            )
+            self._flow_templates[datapath.id] = template
+        return template
+
+    def send_path_flow(self, datapath, src_bytes, dst_bytes, out_port):
+        """Send a priority-10 eth_src/eth_dst flow by patching the template"""
+        template, dst_off, src_off, port_off = self._path_flow_template(datapath)
+        buf = bytearray(template)
+        buf[dst_off:dst_off + 6] = dst_bytes
+        buf[src_off:src_off + 6] = src_bytes
+        struct.pack_into('!I', buf, port_off, out_port)
+        
+        # Same xid bookkeeping as Datapath.set_xid
+        datapath.xid = (datapath.xid + 1) & datapath.ofproto.MAX_XID
+        struct.pack_into('!I', buf, 4, datapath.xid)
+        self._send_raw(datapath, buf)
+
+    def _send_raw(self, datapath, buf):
+        """Send serialized bytes now, or queue them while a batch is open"""
+        if self._send_batch is None:
+            datapath.send(bytes(buf))
+        else:
+            self._send_batch.setdefault(datapath.id, bytearray()).extend(buf)
+
+    def _send_mod(self, datapath, msg):
+        """Serialize an OpenFlow message and pass it to _send_raw"""
+        datapath.set_xid(msg)
+        msg.serialize()
+        self._send_raw(datapath, msg.buf)
+
+    def begin_batch(self):
+        """Start collecting outgoing messages per datapath"""
+        self._send_batch = {}
+
+    def flush_batch(self):
+        """Send each datapath's queued messages plus a barrier in one write"""
+        batch, self._send_batch = self._send_batch, None
+        for dpid, buf in batch.items():
+            datapath = self.datapaths.get(dpid)
+            if datapath is None:
+                continue
+            barrier = datapath.ofproto_parser.OFPBarrierRequest(datapath)
+            datapath.set_xid(barrier)
+            barrier.serialize()
+            buf.extend(barrier.buf)
+            datapath.send(bytes(buf))
+
+    def _port_between(self, sw_a, sw_b):
+        """Output port from sw_a to neighbor sw_b, or None"""
+        key = (sw_a, sw_b)
+        try:
+            return self._port_cache[key]
+        except KeyError:
+            port = self._port_cache[key] = self.switch_ports[sw_a].get(sw_b)
+            return port
+
+    def _invalidate_port_cache(self):
+        """Drop port lookups cached for the previous topology"""
+        self._port_cache.clear()
+
+    def _action_out(self, datapath, port):
+        """Return a cached output action list for (datapath, port)"""
+        key = (datapath.id, port)
+        actions = self._action_cache.get(key)
+        if actions is None:
+            actions = [datapath.ofproto_parser.OFPActionOutput(port)]
+            self._action_cache[key] = actions
+        return actions
+
     def calculate_path(self, src_dpid, dst_dpid):
         """Calculate shortest path using Dijkstra"""
         if src_dpid == dst_dpid:
             return [src_dpid]
         
         if src_dpid not in self.topology or dst_dpid not in self.topology:
-            self.logger.error(f"  ❌ Switch s{src_dpid} or s{dst_dpid} not in topology")
+            self.logger.error("  ❌ Switch s%s or s%s not in topology", src_dpid, dst_dpid)
             return None
         
         try:
-            path = nx.shortest_path(self.topology, src_dpid, dst_dpid, weight='weight')
+            # Bidirectional search meets in the middle and visits fewer nodes
+            _, path = nx.bidirectional_dijkstra(self.topology, src_dpid, dst_dpid, weight='weight')
             self.path_count += 1
             
-            # Log path calculation
-            path_str = " → ".join([f"s{dpid}" for dpid in path])
-            self.logger.info(f"\n🧮 PATH CALCULATION #{self.path_count}")
-            self.logger.info(f"  From: s{src_dpid} To: s{dst_dpid}")
-            self.logger.info(f"  Path ({len(path)-1} hops): {path_str}")
+            # Log path calculation (only build the summary when it will be shown)
+            if self.logger.isEnabledFor(logging.INFO):
+                path_str = " → ".join([f"s{dpid}" for dpid in path])
+                self.logger.info("\n🧮 PATH CALCULATION #%d", self.path_count)
+                self.logger.info("  From: s%s To: s%s", src_dpid, dst_dpid)
+                self.logger.info("  Path (%d hops): %s", len(path) - 1, path_str)
             
             return path
             
         except nx.NetworkXNoPath:
-            self.logger.error(f"  ❌ NO PATH from s{src_dpid} to s{dst_dpid}")
+            self.logger.error("  ❌ NO PATH from s%s to s%s", src_dpid, dst_dpid)
             return None
 
     def install_path(self, path, src_mac, dst_mac):
         """Install flows along the path"""
-        self.logger.info(f"  📝 Installing flows for {src_mac} -> {dst_mac}")
+        self.logger.info("  📝 Installing flows for %s -> %s", src_mac, dst_mac)
+        self._track_path((src_mac, dst_mac), path)
+        src_bytes = addrconv.mac.text_to_bin(src_mac)
+        dst_bytes = addrconv.mac.text_to_bin(dst_mac)
         
         for i in range(len(path) - 1):
             curr_dpid = path[i]
@@ -148,19 +265,118 @@ class UnifiedDijkstraController(app_manager.RyuApp):
                 continue
             
             # Get output port
-            out_port = self.switch_ports[curr_dpid].get(next_dpid)
+            out_port = self._port_between(curr_dpid, next_dpid)
             if not out_port:
                 continue
             
-            datapath = self.datapaths[curr_dpid]
-            parser = datapath.ofproto_parser
+            # Install forward flow from the pre-serialized template
+            self.send_path_flow(self.datapaths[curr_dpid], src_bytes, dst_bytes, out_port)
             
-            # Install forward flow
+            self.logger.info("    s%s: out_port=%s -> s%s", curr_dpid, out_port, next_dpid)
+
+    @staticmethod
+    def _edge_key(sw_a, sw_b):
+        """Undirected edge key used by edge_to_pairs"""
+        return (sw_a, sw_b) if sw_a < sw_b else (sw_b, sw_a)
+
+    def _track_path(self, flow_key, path):
+        """Remember which links an installed flow traverses"""
+        now = time.monotonic()
+        self._expire_paths(now)
+        
+        # A packet-in on a transit switch (e.g. one racing the first FlowMods)
+        # installs only the rest of the path, so merge it into the hops that
+        # are still installed instead of replacing them
+        hops = {dpid: hop for dpid, hop in (self._untrack_path(flow_key) or {}).items()
+                if hop[1] > now}
+        expires = now + FLOW_HARD_TIMEOUT
+        for i in range(len(path) - 1):
+            hops[path[i]] = (path[i + 1], expires)
+        
+        self.installed_paths[flow_key] = hops
+        for dpid, (next_dpid, _) in hops.items():
+            self.edge_to_pairs[self._edge_key(dpid, next_dpid)].add(flow_key)
+
+    def _untrack_path(self, flow_key):
+        """Forget an installed flow and return its hops ({dpid: (next_dpid, expires)})"""
+        hops = self.installed_paths.pop(flow_key, None)
+        if hops:
+            for dpid, (next_dpid, _) in hops.items():
+                edge = self._edge_key(dpid, next_dpid)
+                pairs = self.edge_to_pairs.get(edge)
+                if pairs:
+                    pairs.discard(flow_key)
+                    if not pairs:
+                        del self.edge_to_pairs[edge]
+        return hops
+
+    def _expire_paths(self, now):
+        """Forget tracked flows whose entries have all reached their hard timeout"""
+        # Tracking moves a flow to the end, so the front one expires first
+        while self.installed_paths:
+            flow_key, hops = next(iter(self.installed_paths.items()))
+            if max((expires for _, expires in hops.values()), default=0) > now:
+                break
+            self._untrack_path(flow_key)
+
+    def delete_path_flows(self, dpids, src_mac, dst_mac, keep=()):
+        """Remove the exact flows install_path put on each of dpids"""
+        for dpid in dpids:
+            datapath = self.datapaths.get(dpid)
+            if datapath is None or dpid in keep:
+                continue
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
             match = parser.OFPMatch(eth_dst=dst_mac, eth_src=src_mac)
-            actions = [parser.OFPActionOutput(out_port)]
-            self.add_flow(datapath, 10, match, actions)
-            
-            self.logger.info(f"    s{curr_dpid}: out_port={out_port} -> s{next_dpid}")
+            mod = parser.OFPFlowMod(
+                datapath=datapath,
+                command=ofproto.OFPFC_DELETE_STRICT,
+                out_port=ofproto.OFPP_ANY,
+                out_group=ofproto.OFPG_ANY,
+                priority=10,
+                match=match
+            )
+            self._send_mod(datapath, mod)
+
+    def reroute_affected_flows(self, sw_a, sw_b):
+        """Reinstall only the flows whose path used the failed link"""
+        affected = self.edge_to_pairs.pop(self._edge_key(sw_a, sw_b), set())
+        self.logger.info("  🔄 Rerouting %d flows that used s%s <--> s%s",
+                         len(affected), sw_a, sw_b)
+        
+        # Queue deletes and reinstalls so each switch gets a single write
+        self.begin_batch()
+        try:
+            now = time.monotonic()
+            for src_mac, dst_mac in affected:
+                hops = self._untrack_path((src_mac, dst_mac))
+                # Entries the switches have already timed out need no reroute
+                hops = {dpid: hop for dpid, hop in (hops or {}).items() if hop[1] > now}
+                if not hops:
+                    continue
+                
+                # The hops form a tree towards the destination switch; rebuild
+                # a path from every switch that no other hop forwards to
+                next_dpids = {next_dpid for next_dpid, _ in hops.values()}
+                dst_dpids = next_dpids - hops.keys()
+                new_paths = []
+                if len(dst_dpids) == 1:
+                    dst_dpid = dst_dpids.pop()
+                    for head in hops.keys() - next_dpids:
+                        new_path = self.calculate_path(head, dst_dpid)
+                        if new_path and len(new_path) > 1:
+                            new_paths.append(new_path)
+                
+                # Switches on a new path get overwritten by the add, so only
+                # delete where the flow would otherwise linger
+                keep = {dpid for new_path in new_paths for dpid in new_path[:-1]}
+                self.delete_path_flows(hops, src_mac, dst_mac, keep=keep)
+                for new_path in new_paths:
+                    self.install_path(new_path, src_mac, dst_mac)
+        finally:
+            self.flush_batch()
+        
+        self.logger.info("  ✅ Unaffected flows kept in place")
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
@@ -173,7 +389,7 @@ class UnifiedDijkstraController(app_manager.RyuApp):
         dpid = datapath.id
         
         pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        eth_pkt = pkt.get_protocol(ethernet.ethernet)
         
         # Ignore LLDP
         if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
@@ -181,32 +397,42 @@ class UnifiedDijkstraController(app_manager.RyuApp):
         
         dst_mac = eth_pkt.dst
         src_mac = eth_pkt.src
+        # Raw 6-byte addresses are cheaper dict keys than colon strings;
+        # the strings are only needed for OFPMatch and log output
+        dst_bytes = bytes(msg.data[0:6])
+        src_bytes = bytes(msg.data[6:12])
         
         # Learn MAC location
         self.mac_to_port.setdefault(dpid, {})
-        self.mac_to_port[dpid][src_mac] = in_port
-        self.mac_to_dpid[src_mac] = dpid
+        self.mac_to_port[dpid][src_bytes] = in_port
+        self.mac_to_dpid[src_bytes] = dpid
         
-        # Ignore multicast/broadcast (reduce log spam)
-        if dst_mac[:5] in ['33:33', 'ff:ff', '01:00']:
+        # Ignore multicast/broadcast (reduce log spam). The I/G bit of the
+        # first destination byte is set for broadcast and every multicast
+        # range (33:33, 01:00:5e, 01:80:c2, ...)
+        if msg.data[0] & 0x01:
             out_port = ofproto.OFPP_FLOOD
-        elif dst_mac in self.mac_to_dpid:
-            dst_dpid = self.mac_to_dpid[dst_mac]
+        elif dst_bytes in self.mac_to_dpid:
+            dst_dpid = self.mac_to_dpid[dst_bytes]
             
             if dpid == dst_dpid:
                 # Same switch
-                if dst_mac in self.mac_to_port[dpid]:
-                    out_port = self.mac_to_port[dpid][dst_mac]
+                if dst_bytes in self.mac_to_port[dpid]:
+                    out_port = self.mac_to_port[dpid][dst_bytes]
                 else:
                     out_port = ofproto.OFPP_FLOOD
             else:
                 # Different switch - calculate path
-                self.logger.info(f"\n📨 PACKET_IN at s{dpid}: {src_mac} -> {dst_mac}")
-                path = self.calculate_path(dpid, dst_dpid)
+                self.logger.info("\n📨 PACKET_IN at s%s: %s -> %s", dpid, src_mac, dst_mac)
+                if dst_dpid in self.switch_ports[dpid]:
+                    # Direct neighbor - one hop is always shortest, skip Dijkstra
+                    path = [dpid, dst_dpid]
+                else:
+                    path = self.calculate_path(dpid, dst_dpid)
                 
                 if path and len(path) > 1:
                     next_dpid = path[1]
-                    out_port = self.switch_ports[dpid].get(next_dpid, ofproto.OFPP_FLOOD)
+                    out_port = self._port_between(dpid, next_dpid) or ofproto.OFPP_FLOOD
                     
                     if out_port != ofproto.OFPP_FLOOD:
                         # Install flows for entire path
@@ -217,7 +443,7 @@ class UnifiedDijkstraController(app_manager.RyuApp):
             out_port = ofproto.OFPP_FLOOD
         
         # Send packet out
-        actions = [parser.OFPActionOutput(out_port)]
+        actions = self._action_out(datapath, out_port)
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
             data = msg.data
@@ -248,41 +474,23 @@ class UnifiedDijkstraController(app_manager.RyuApp):
         self.logger.warning(f"\n⚠️  LINK FAILURE DETECTED at s{dpid}:{port_no}")
         
         # Find and remove the failed link
-        for neighbor in list(self.switch_ports[dpid].keys()):
-            if self.switch_ports[dpid][neighbor] == port_no:
-                if self.topology.has_edge(dpid, neighbor):
-                    self.logger.error(f"  💥 Removing link: s{dpid} <--> s{neighbor}")
-                    self.topology.remove_edge(dpid, neighbor)
-                    
-                    # Check if network is still connected
-                    if nx.is_connected(self.topology):
-                        self.logger.info(f"  ✅ Network still connected")
-                    else:
-                        components = nx.number_connected_components(self.topology)
-                        self.logger.error(f"  ⚠️  Network PARTITIONED into {components} parts!")
-                    
-                    # Clear all flows to force recalculation
-                    self.clear_all_flows()
-                break
-
-    def clear_all_flows(self):
-        """Clear flows on all switches"""
-        self.logger.info("  🔄 Clearing all flows for rerouting...")
-        
-        for dpid, datapath in self.datapaths.items():
-            ofproto = datapath.ofproto
-            parser = datapath.ofproto_parser
+        neighbor = self.port_to_neighbor[dpid].pop(port_no, None)
+        if neighbor is not None and self.topology.has_edge(dpid, neighbor):
+            self.logger.error(f"  💥 Removing link: s{dpid} <--> s{neighbor}")
+            self.topology.remove_edge(dpid, neighbor)
+            self._invalidate_port_cache()
+            # Keep port maps in sync so the neighbor fast path stays valid
+            peer_port = self.switch_ports[neighbor].pop(dpid, None)
+            self.switch_ports[dpid].pop(neighbor, None)
+            self.port_to_neighbor[neighbor].pop(peer_port, None)
             
-            # Delete all flows except table-miss
-            match = parser.OFPMatch()
-            mod = parser.OFPFlowMod(
-                datapath=datapath,
-                command=ofproto.OFPFC_DELETE,
-                out_port=ofproto.OFPP_ANY,
-                out_group=ofproto.OFPG_ANY,
-                priority=1,
-                match=match
-            )
-            datapath.send_msg(mod)
-        
-        self.logger.info("  ✅ Flows cleared - next packet will trigger new paths")
\ No newline at end of file
+            # Check if network is still connected; a partition is always
+            # reported, the healthy case only when INFO is on
+            if not nx.is_connected(self.topology):
+                components = nx.number_connected_components(self.topology)
+                self.logger.error("  ⚠️  Network PARTITIONED into %d parts!", components)
+            elif self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("  ✅ Network still connected")
+            
+            # Only touch flows that actually crossed the failed link
+            self.reroute_affected_flows(dpid, neighbor)
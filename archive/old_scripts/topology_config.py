@@ -6,7 +6,7 @@ This file defines the exact topology used by both controller and Mininet
 # 10-Switch Graph Topology Definition
 # Using a more structured approach with clear port assignments
 
-TOPOLOGY_LINKS = [
+TOPOLOGY_LINKS = (
     # Format: (switch1, switch2, port_on_sw1, port_on_sw2)
     # Horizontal connections (Row 1: s1-s2-s3)
     (1, 2, 2, 2),  # s1:2 <-> s2:2
@@ -40,7 +40,7 @@ TOPOLOGY_LINKS = [
     
     # Connect s10 to center of network
     (5, 10, 8, 2),  # s5:8 <-> s10:2 (s10 connected to central s5)
-]
+)
 
 # Visual representation of the topology
 TOPOLOGY_DIAGRAM = """
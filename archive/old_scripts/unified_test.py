@@ -10,11 +10,20 @@ from mininet.net import Mininet
 from mininet.node import RemoteController, OVSSwitch
 from mininet.cli import CLI
 from mininet.log import setLogLevel, info
+from mininet.clean import cleanup
 
 # Import topology configuration
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from topology_config import get_topology_links, get_host_connections, TOPOLOGY_DIAGRAM
 
+# Shared ping helpers live next to the topology scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'mininet'))
+from ping_utils import packet_loss, run_pings
+
+# Let OVS configure all bridges and ports in one ovs-vsctl transaction at
+# net.start() instead of one transaction per switch
+BATCH_SWITCHES = True
+
 class Colors:
     GREEN = '\033[92m'
     RED = '\033[91m'
@@ -40,7 +49,8 @@ def create_topology():
     print(f"{Colors.BLUE}Creating 10 switches...{Colors.END}")
     switches = {}
     for i in range(1, 11):
-        switches[i] = net.addSwitch(f's{i}', protocols='OpenFlow13', dpid=str(i))
+        switches[i] = net.addSwitch(f's{i}', protocols='OpenFlow13', dpid=str(i),
+                                    batch=BATCH_SWITCHES)
     
     # Create hosts
     print(f"{Colors.BLUE}Creating 10 hosts...{Colors.END}")
@@ -71,11 +81,14 @@ def test_basic_connectivity(hosts):
         (1, 9, "Corner to corner"),
     ]
     
+    # Fire all pings at once, then report in test order
+    outputs = run_pings([(hosts[h1_id], f"10.0.0.{h2_id}") for h1_id, h2_id, _ in tests],
+                        count=2)
+    
     results = []
-    for h1_id, h2_id, desc in tests:
+    for (h1_id, h2_id, desc), output in zip(tests, outputs):
         print(f"  Testing h{h1_id} -> h{h2_id} ({desc})...", end=' ')
-        result = hosts[h1_id].cmd(f'ping -c 2 -W 1 10.0.0.{h2_id}')
-        if '0% packet loss' in result:
+        if packet_loss(output) == 0:
             print(f"{Colors.GREEN}✅ SUCCESS{Colors.END}")
             results.append(True)
         else:
@@ -91,7 +104,7 @@ def test_link_failure(net, hosts):
     # Test initial path
     print(f"  Initial test h1 -> h3...", end=' ')
     result = hosts[1].cmd('ping -c 2 -W 1 10.0.0.3')
-    initial = '0% packet loss' in result
+    initial = packet_loss(result) == 0
     print(f"{Colors.GREEN if initial else Colors.RED}{'✅' if initial else '❌'}{Colors.END}")
     
     # Break link s1-s2
@@ -102,7 +115,7 @@ def test_link_failure(net, hosts):
     # Test rerouting
     print(f"  Testing rerouting h1 -> h3...", end=' ')
     result = hosts[1].cmd('ping -c 3 -W 1 10.0.0.3')
-    rerouted = '0% packet loss' in result
+    rerouted = packet_loss(result) == 0
     print(f"{Colors.GREEN if rerouted else Colors.RED}{'✅ REROUTED' if rerouted else '❌ NO PATH'}{Colors.END}")
     
     # Restore link
@@ -113,7 +126,7 @@ def test_link_failure(net, hosts):
     # Test restoration
     print(f"  Testing restored path h1 -> h3...", end=' ')
     result = hosts[1].cmd('ping -c 2 -W 1 10.0.0.3')
-    restored = '0% packet loss' in result
+    restored = packet_loss(result) == 0
     print(f"{Colors.GREEN if restored else Colors.RED}{'✅' if restored else '❌'}{Colors.END}")
     
     return initial and rerouted and restored
@@ -125,7 +138,7 @@ def test_multiple_failures(net, hosts):
     # Initial test
     print(f"  Initial test h1 -> h9...", end=' ')
     result = hosts[1].cmd('ping -c 2 -W 1 10.0.0.9')
-    initial = '0% packet loss' in result
+    initial = packet_loss(result) == 0
     print(f"{Colors.GREEN if initial else Colors.RED}{'✅' if initial else '❌'}{Colors.END}")
     
     # Break multiple links
@@ -139,7 +152,7 @@ def test_multiple_failures(net, hosts):
     # Test with multiple failures
     print(f"  Testing with failures h1 -> h9...", end=' ')
     result = hosts[1].cmd('ping -c 3 -W 1 10.0.0.9')
-    multi_route = '0% packet loss' in result
+    multi_route = packet_loss(result) == 0
     print(f"{Colors.GREEN if multi_route else Colors.RED}{'✅ REROUTED' if multi_route else '❌'}{Colors.END}")
     
     # Restore all links
@@ -154,7 +167,7 @@ def main():
     setLogLevel('warning')
     
     # Clean up
-    os.system("sudo mn -c 2>/dev/null")
+    cleanup()  # same as `mn -c`, without the extra sudo/shell processes
     
     # Create topology
     net, hosts, switches = create_topology()
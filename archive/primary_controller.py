@@ -8,20 +8,121 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types, arp, ipv4
+from ryu.lib.packet import packet, ether_types, arp, ipv4
 import networkx as nx
 import logging
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+import struct
+
+# Shared helpers live next to this file
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from routing_utils import floyd_warshall
+
+NUM_SWITCHES = 10
+
+# Ethernet header: dst MAC, src MAC, ethertype
+_ETH_HDR = struct.Struct('!6s6sH')
+
+# Cross-domain egress on the gateway switches: dpid -> (bitmask over the low
+# MAC byte, port) for the special cases, GATEWAY_DEFAULT_PORTS for the rest
+GATEWAY_ALT_PORTS = {
+    3: ((1 << 0x0b) | (1 << 0x0c), 5),  # s3: h11/h12 via s6, rest via s7
+    4: ((1 << 0x0f) | (1 << 0x10), 5),  # s4: h15/h16 via s8, rest via s9
+}
+GATEWAY_DEFAULT_PORTS = {3: 6, 4: 6, 5: 4}  # s5: everything via s10
+DEFAULT_GATEWAY = 3  # non-gateway switches head towards s3
+
+# Port mapping based on actual topology
+# Hosts are on ports 1-2, switch links on ports 3+
+PORT_MAP = {
+    1: {2: 3, 3: 4},               # s1: s2->port3, s3->port4
+    2: {1: 3, 4: 4, 5: 5},         # s2: s1->port3, s4->port4, s5->port5
+    3: {1: 3, 4: 4, 6: 5, 7: 6},  # s3: s1->port3, s4->port4, s6->port5, s7->port6
+    4: {2: 3, 3: 4, 8: 5, 9: 6},  # s4: s2->port3, s3->port4, s8->port5, s9->port6
+    5: {2: 3, 10: 4}               # s5: s2->port3, s10->port4
+}
+
+# Flat lookup tables: NEXT_HOP_PORT[cur * SWITCH_STRIDE + nxt] -> port and
+# PORT_TO_NEIGHBOR[dpid * PORT_STRIDE + port] -> neighbor, -1 when unset
+SWITCH_STRIDE = NUM_SWITCHES + 1
+PORT_STRIDE = 16
+NEXT_HOP_PORT = array('b', [-1] * (SWITCH_STRIDE * SWITCH_STRIDE))
+PORT_TO_NEIGHBOR = array('b', [-1] * (SWITCH_STRIDE * PORT_STRIDE))
+for _sw, _ports in PORT_MAP.items():
+    for _neighbor, _port in _ports.items():
+        NEXT_HOP_PORT[_sw * SWITCH_STRIDE + _neighbor] = _port
+        PORT_TO_NEIGHBOR[_sw * PORT_STRIDE + _port] = _neighbor
+
+
+def _mac_fmt(mac_bytes):
+    """Format 6 raw bytes as a colon-separated MAC string"""
+    return mac_bytes.hex(':')
+
+
+@lru_cache(maxsize=1024)
+def _mac_to_int(mac):
+    """Convert a colon-separated MAC string to a 48-bit int"""
+    return int(mac.replace(':', ''), 16)
+
+
+def _host_index(mac_int):
+    """Learning-table slot for a lab host MAC (00:..:00:xx), 0 for others"""
+    return mac_int if mac_int <= 0xff else 0
+
+
+@dataclass
+class _CSR:
+    """Compressed sparse row adjacency, rows indexed by switch id"""
+    row_ptr: array
+    col_idx: array
+    weight: array
+
+    @classmethod
+    def from_edges(cls, num_nodes, edges):
+        """Build from undirected (src, dst, weight) edges"""
+        adjacency = [[] for _ in range(num_nodes)]
+        for src, dst, weight in edges:
+            adjacency[src].append((dst, weight))
+            adjacency[dst].append((src, weight))
+        
+        row_ptr, col_idx, weights = array('i', [0]), array('i'), array('i')
+        for neighbors in adjacency:
+            for dst, weight in sorted(neighbors):  # sorted for edge_id bisect
+                col_idx.append(dst)
+                weights.append(weight)
+            row_ptr.append(len(col_idx))
+        return cls(row_ptr, col_idx, weights)
+
+    def edge_id(self, src, dst):
+        """Index of the src->dst entry in col_idx, or -1"""
+        lo, hi = self.row_ptr[src], self.row_ptr[src + 1]
+        i = bisect_left(self.col_idx, dst, lo, hi)
+        if i < hi and self.col_idx[i] == dst:
+            return i
+        return -1
+
 
 class PrimaryController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
 
     def __init__(self, *args, **kwargs):
         super(PrimaryController, self).__init__(*args, **kwargs)
-        self.mac_to_port = {}
+        self.mac_to_port = {}  # dpid -> bytearray(256): host index -> port, 0 = unknown
         self.topology = self._build_topology()
+        self._recompute_routes()
         self.switches = set()
         self.datapaths = {}  # Store datapath objects
-        self.mac_to_switch = {}  # Track which switch a MAC is connected to
+        self._pending = defaultdict(list)  # datapath -> queued OpenFlow messages
+        # (dpid, priority, in_port or None, eth_dst) -> out_port of installed flows
+        self._installed_flows = {}
+        self.mac_to_switch = bytearray(256)  # host index -> dpid, 0 = unknown
         # Cross-controller communication can be added later if needed
         
         # Domain configuration
@@ -29,7 +130,10 @@ class PrimaryController(app_manager.RyuApp):
         self.gateway_switches = {3, 4, 5}   # Can communicate with secondary
         
         # Host mapping (MAC addresses)
-        self.primary_hosts = set(f"00:00:00:00:00:{i:02x}" for i in range(1, 11))  # h1-h10
+        self.primary_hosts = frozenset(range(1, 11))  # h1-h10 as MAC ints
+        self._primary_mac_bits = bytearray(256)  # low MAC byte -> 1 if primary
+        for mac in self.primary_hosts:
+            self._primary_mac_bits[mac] = 1
         
         logging.basicConfig(level=logging.INFO)
         self.logger.info("[PRIMARY] Controller started - managing s1-s5")
@@ -56,6 +160,10 @@ class PrimaryController(app_manager.RyuApp):
         
         for src, dst, weight in edges:
             G.add_edge(src, dst, weight=weight)
+        
+        # Contiguous adjacency used for routing; G is kept for debug listings
+        self._csr = _CSR.from_edges(NUM_SWITCHES + 1, edges)
+        self._edge_alive = bytearray(b'\x01' * len(self._csr.col_idx))
             
         self.logger.info(f"[PRIMARY] Topology built with {G.number_of_nodes()} nodes, {G.number_of_edges()} edges")
         return G
@@ -79,8 +187,8 @@ class PrimaryController(app_manager.RyuApp):
                                             ofproto.OFPCML_NO_BUFFER)]
             self.add_flow(datapath, 0, match, actions)
 
-    def add_flow(self, datapath, priority, match, actions, buffer_id=None):
-        """Add flow entry to switch"""
+    def add_flow(self, datapath, priority, match, actions, buffer_id=None, flush=True):
+        """Add flow entry to switch (queued only when flush=False)"""
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         
@@ -92,59 +200,131 @@ class PrimaryController(app_manager.RyuApp):
         else:
             mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
                                   match=match, instructions=inst)
-        datapath.send_msg(mod)
+        self._pending[datapath].append(mod)
+        if flush:
+            self._flush(datapath)
+
+    def _flush(self, datapath):
+        """Send all queued messages for a datapath in a single write"""
+        msgs = self._pending.pop(datapath, None)
+        if not msgs:
+            return
+        buf = bytearray()
+        for msg in msgs:
+            datapath.set_xid(msg)
+            msg.serialize()
+            buf += msg.buf
+        datapath.send(bytes(buf))
+
+    def _flush_pending(self):
+        """Flush the queues of every datapath that has messages waiting"""
+        for datapath in list(self._pending):
+            self._flush(datapath)
+
+    def _has_link(self, src, dst):
+        """Check whether the src-dst link is currently up"""
+        edge = self._csr.edge_id(src, dst)
+        return edge >= 0 and self._edge_alive[edge] == 1
+
+    def _set_link(self, src, dst, alive):
+        """Mark both directions of the src-dst link up or down"""
+        for a, b in ((src, dst), (dst, src)):
+            edge = self._csr.edge_id(a, b)
+            if edge >= 0:
+                self._edge_alive[edge] = 1 if alive else 0
+
+    def _recompute_routes(self):
+        """Precompute all-pairs shortest paths with Floyd-Warshall"""
+        csr, alive = self._csr, self._edge_alive
+        n = len(csr.row_ptr) - 1
+        inf = float('inf')
+        dist = [[inf] * n for _ in range(n)]
+        nxt = [[-1] * n for _ in range(n)]
+        for u in range(1, n):
+            for e in range(csr.row_ptr[u], csr.row_ptr[u + 1]):
+                if alive[e]:
+                    v = csr.col_idx[e]
+                    dist[u][v] = csr.weight[e]
+                    nxt[u][v] = v
+        floyd_warshall(dist, nxt)
+        self._dist = dist
+        
+        # Reachability index: each switch is labelled with the lowest switch
+        # id it can reach, so two switches share a label iff connected
+        self._component_id = array('b', [0] * n)
+        for i in range(1, n):
+            self._component_id[i] = next(j for j in range(1, n) if dist[i][j] != inf)
+        
+        # Walk the next-hop table once so lookups never rebuild paths
+        self._paths = {}
+        for src in range(1, n):
+            self._paths[src] = {}
+            for dst in range(1, n):
+                if nxt[src][dst] < 0:
+                    continue
+                path = [src]
+                while path[-1] != dst:
+                    path.append(nxt[path[-1]][dst])
+                self._paths[src][dst] = path
+        self._next_hop = {
+            src: {dst: path[1] for dst, path in paths.items() if len(path) > 1}
+            for src, paths in self._paths.items()
+        }
+        
+        # Egress port for cross-domain traffic, per switch
+        self._gateway_port = dict(GATEWAY_DEFAULT_PORTS)
+        for src in range(1, n):
+            next_hop = self._next_hop[src].get(DEFAULT_GATEWAY)
+            if src not in GATEWAY_DEFAULT_PORTS and next_hop:
+                self._gateway_port[src] = self._get_next_hop_port(src, next_hop)
+        self.logger.info("[PRIMARY] Routing table computed for %d switches", len(self._paths))
 
     def _dijkstra_path(self, src, dst):
-        """Calculate shortest path using Dijkstra algorithm"""
-        self.logger.info(f"[PRIMARY][DIJKSTRA] Computing path from s{src} to s{dst}")
-        try:
-            if self.topology.has_node(src) and self.topology.has_node(dst):
-                # Calculate all possible paths for comparison
-                all_paths = list(nx.all_simple_paths(self.topology, src, dst, cutoff=5))
-                self.logger.info(f"[PRIMARY][DIJKSTRA] Found {len(all_paths)} possible paths")
-                
-                # Calculate shortest path using Dijkstra
-                path = nx.shortest_path(self.topology, src, dst, weight='weight')
-                cost = nx.shortest_path_length(self.topology, src, dst, weight='weight')
-                
-                # Log the chosen path
-                path_str = " -> ".join([f"s{node}" for node in path])
-                self.logger.info(f"[PRIMARY][DIJKSTRA] ✓ OPTIMAL PATH: {path_str} (cost={cost})")
-                
-                # Log alternative paths for comparison
-                for i, alt_path in enumerate(all_paths[:3]):  # Show up to 3 alternatives
-                    if alt_path != path:
-                        alt_cost = sum(self.topology[alt_path[j]][alt_path[j+1]].get('weight', 1) 
-                                     for j in range(len(alt_path)-1))
-                        alt_str = " -> ".join([f"s{node}" for node in alt_path])
-                        self.logger.info(f"[PRIMARY][DIJKSTRA]   Alternative {i+1}: {alt_str} (cost={alt_cost})")
-                
-                return path, cost
-        except nx.NetworkXNoPath:
-            self.logger.error(f"[PRIMARY][DIJKSTRA] ✗ NO PATH found from s{src} to s{dst}")
-        except Exception as e:
-            self.logger.error(f"[PRIMARY][DIJKSTRA] Error: {e}")
-        return None, float('inf')
+        """Look up the precomputed shortest path and its cost"""
+        if self._component_id[src] != self._component_id[dst]:
+            self.logger.error("[PRIMARY][DIJKSTRA] ✗ s%s and s%s are in different partitions", src, dst)
+            return None, float('inf')
+        path = self._paths.get(src, {}).get(dst)
+        if not path:
+            self.logger.error("[PRIMARY][DIJKSTRA] ✗ NO PATH found from s%s to s%s", src, dst)
+            return None, float('inf')
+        cost = self._dist[src][dst]
+        
+        # Log the chosen path
+        if self.logger.isEnabledFor(logging.INFO):
+            path_str = " -> ".join([f"s{node}" for node in path])
+            self.logger.info("[PRIMARY][DIJKSTRA] ✓ OPTIMAL PATH s%s -> s%s: %s (cost=%s)",
+                             src, dst, path_str, cost)
+        
+        # Yen's K-shortest paths: only the 3 cheapest are generated, not every simple path
+        if self.logger.isEnabledFor(logging.DEBUG):
+            all_paths = list(islice(nx.shortest_simple_paths(self.topology, src, dst, weight='weight'), 3))
+            self.logger.debug(f"[PRIMARY][DIJKSTRA] Found {len(all_paths)} cheapest paths")
+            for i, alt_path in enumerate(all_paths):  # Show up to 3 alternatives
+                if alt_path != path:
+                    alt_cost = sum(self.topology[alt_path[j]][alt_path[j+1]].get('weight', 1) 
+                                 for j in range(len(alt_path)-1))
+                    alt_str = " -> ".join([f"s{node}" for node in alt_path])
+                    self.logger.debug(f"[PRIMARY][DIJKSTRA]   Alternative {i+1}: {alt_str} (cost={alt_cost})")
+        
+        return path, cost
 
     def _get_next_hop_port(self, current_switch, next_switch):
         """Get output port for next hop"""
-        # Port mapping based on actual topology
-        # Hosts are on ports 1-2, switch links on ports 3+
-        port_map = {
-            1: {2: 3, 3: 4},               # s1: s2->port3, s3->port4
-            2: {1: 3, 4: 4, 5: 5},         # s2: s1->port3, s4->port4, s5->port5
-            3: {1: 3, 4: 4, 6: 5, 7: 6},  # s3: s1->port3, s4->port4, s6->port5, s7->port6
-            4: {2: 3, 3: 4, 8: 5, 9: 6},  # s4: s2->port3, s3->port4, s8->port5, s9->port6
-            5: {2: 3, 10: 4}               # s5: s2->port3, s10->port4
-        }
-        port = port_map.get(current_switch, {}).get(next_switch, None)
-        if port:
-            self.logger.debug(f"[PRIMARY] Port mapping: s{current_switch} -> s{next_switch} = port {port}")
-        return port
+        port = NEXT_HOP_PORT[current_switch * SWITCH_STRIDE + next_switch]
+        return port if port > 0 else None
+
+    def _get_neighbor_on_port(self, switch_id, port):
+        """Get the neighbor switch reached through a port"""
+        if not 0 < port < PORT_STRIDE:
+            return None
+        neighbor = PORT_TO_NEIGHBOR[switch_id * PORT_STRIDE + port]
+        return neighbor if neighbor > 0 else None
 
     def _is_cross_domain_dst(self, dst_mac):
         """Check if destination is in secondary domain"""
-        return dst_mac not in self.primary_hosts
+        mac = _mac_to_int(dst_mac)
+        return mac > 0xff or not self._primary_mac_bits[mac]
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
@@ -159,43 +339,48 @@ class PrimaryController(app_manager.RyuApp):
         if dpid not in self.my_switches:
             return
             
-        pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        # Read the Ethernet header directly instead of running Ryu's full parser
+        dst_bytes, src_bytes, ethertype = _ETH_HDR.unpack_from(msg.data)
         
-        if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
+        if ethertype == ether_types.ETH_TYPE_LLDP:
             return
             
-        dst_mac = eth_pkt.dst
-        src_mac = eth_pkt.src
+        dst_mac = _mac_fmt(dst_bytes)
+        src_mac = _mac_fmt(src_bytes)
         
         # Learn source MAC and which switch it's on
-        self.mac_to_port.setdefault(dpid, {})
-        self.mac_to_port[dpid][src_mac] = in_port
-        self.mac_to_switch[src_mac] = dpid
+        src_idx = _host_index(int.from_bytes(src_bytes, 'big'))
+        dst_idx = _host_index(int.from_bytes(dst_bytes, 'big'))
+        if src_idx and in_port <= 0xff and dpid <= 0xff:
+            self.mac_to_port.setdefault(dpid, bytearray(256))[src_idx] = in_port
+            self.mac_to_switch[src_idx] = dpid
+        local_ports = self.mac_to_port.get(dpid)
         
-        # Log ARP packets for debugging
-        if eth_pkt.ethertype == ether_types.ETH_TYPE_ARP:
-            arp_pkt = pkt.get_protocol(arp.arp)
+        # Log ARP packets for debugging (only these need a full parse)
+        if ethertype == ether_types.ETH_TYPE_ARP and self.logger.isEnabledFor(logging.INFO):
+            arp_pkt = packet.Packet(msg.data).get_protocol(arp.arp)
             if arp_pkt:
-                self.logger.info(f"[PRIMARY] ARP: {arp_pkt.src_ip} -> {arp_pkt.dst_ip} on s{dpid}")
-        
-        self.logger.info(f"[PRIMARY] Packet: {src_mac} -> {dst_mac} on s{dpid}:{in_port}")
+                self.logger.info("[PRIMARY] ARP: %s -> %s on s%s", arp_pkt.src_ip, arp_pkt.dst_ip, dpid)
         
         # Determine output port
-        if dst_mac in self.mac_to_port.get(dpid, {}):
+        if dst_idx and local_ports and local_ports[dst_idx]:
             # Known local destination
-            out_port = self.mac_to_port[dpid][dst_mac]
-            self.logger.info(f"[PRIMARY] Local forwarding s{dpid}: {src_mac}->{dst_mac} via port {out_port}")
-        elif dst_mac in self.mac_to_switch:
+            out_port = local_ports[dst_idx]
+            self.logger.info("[PRIMARY] Packet %s -> %s on s%s:%s: local forwarding via port %s",
+                             src_mac, dst_mac, dpid, in_port, out_port)
+        elif dst_idx and self.mac_to_switch[dst_idx]:
             # Destination MAC is known but on a different switch
-            dst_switch = self.mac_to_switch[dst_mac]
+            dst_switch = self.mac_to_switch[dst_idx]
             if dst_switch in self.my_switches:
                 # Calculate path to destination switch
                 path, cost = self._dijkstra_path(dpid, dst_switch)
                 if path and len(path) > 1:
                     next_hop = path[1]
-                    out_port = self._get_next_hop_port(dpid, next_hop)
-                    self.logger.info(f"[PRIMARY] Routing to s{dst_switch}: path={path} via port {out_port}")
+                    out_port = NEXT_HOP_PORT[dpid * SWITCH_STRIDE + next_hop]
+                    if out_port < 0:
+                        out_port = ofproto.OFPP_FLOOD
+                    self.logger.info("[PRIMARY] Packet %s -> %s on s%s:%s: routing to s%s path=%s via port %s",
+                                     src_mac, dst_mac, dpid, in_port, dst_switch, path, out_port)
                     
                     # Install flows along the entire path for efficiency
                     self._install_path_flows(src_mac, dst_mac, path)
@@ -204,15 +389,18 @@ class PrimaryController(app_manager.RyuApp):
             else:
                 # Destination is in secondary domain
                 out_port = self._get_gateway_port(dpid, dst_mac)
-                self.logger.info(f"[PRIMARY] Cross-domain via port {out_port}")
+                self.logger.info("[PRIMARY] Packet %s -> %s on s%s:%s: cross-domain via port %s",
+                                 src_mac, dst_mac, dpid, in_port, out_port)
         elif self._is_cross_domain_dst(dst_mac):
             # Cross-domain communication
             out_port = self._get_gateway_port(dpid, dst_mac)
-            self.logger.info(f"[PRIMARY] Cross-domain: s{dpid} -> Secondary via port {out_port}")
+            self.logger.info("[PRIMARY] Packet %s -> %s on s%s:%s: cross-domain -> Secondary via port %s",
+                             src_mac, dst_mac, dpid, in_port, out_port)
         else:
             # Unknown destination - flood
             out_port = ofproto.OFPP_FLOOD
-            self.logger.info(f"[PRIMARY] Flooding unknown destination {dst_mac}")
+            self.logger.info("[PRIMARY] Packet %s -> %s on s%s:%s: flooding unknown destination",
+                             src_mac, dst_mac, dpid, in_port)
         
         # Install flow and forward packet
         actions = [parser.OFPActionOutput(out_port)]
@@ -220,7 +408,8 @@ class PrimaryController(app_manager.RyuApp):
         if out_port != ofproto.OFPP_FLOOD:
             # Install flow entry
             match = parser.OFPMatch(in_port=in_port, eth_dst=dst_mac)
-            self.add_flow(datapath, 1, match, actions)
+            self.add_flow(datapath, 1, match, actions, flush=False)
+            self._installed_flows[(dpid, 1, in_port, dst_mac)] = out_port
             
         # Forward packet
         data = None
@@ -229,7 +418,10 @@ class PrimaryController(app_manager.RyuApp):
             
         out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
                                 in_port=in_port, actions=actions, data=data)
-        datapath.send_msg(out)
+        self._pending[datapath].append(out)
+        
+        # One write per switch for path flows, local flow and packet-out
+        self._flush_pending()
 
     @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
     def port_status_handler(self, ev):
@@ -251,50 +443,88 @@ class PrimaryController(app_manager.RyuApp):
             # Restore topology
             self._restore_topology_on_recovery(dpid, port)
     
-    def _clear_flows_for_rerouting(self):
-        """Clear flows on all switches to trigger rerouting"""
-        for dpid, datapath in self.datapaths.items():
+    def _current_out_port(self, dpid, dst_mac):
+        """Output port the current routing table picks for dst_mac on dpid"""
+        dst_idx = _host_index(_mac_to_int(dst_mac))
+        local_ports = self.mac_to_port.get(dpid)
+        local_port = (local_ports[dst_idx] or None) if dst_idx and local_ports else None
+        dst_switch = self.mac_to_switch[dst_idx] if dst_idx else 0
+        if dst_switch in self.my_switches:
+            if dst_switch == dpid:
+                return local_port
+            next_hop = self._next_hop.get(dpid, {}).get(dst_switch)
+            return self._get_next_hop_port(dpid, next_hop) if next_hop else None
+        if dst_switch or self._is_cross_domain_dst(dst_mac):
+            return self._get_gateway_port(dpid, dst_mac)
+        return local_port
+
+    def _reroute_installed_flows(self):
+        """Rewrite only the installed flows whose next hop changed"""
+        changed = 0
+        for key, old_port in list(self._installed_flows.items()):
+            dpid, priority, in_port, dst_mac = key
+            datapath = self.datapaths.get(dpid)
+            if datapath is None:
+                continue
+            new_port = self._current_out_port(dpid, dst_mac)
+            if new_port == old_port:
+                continue
+            changed += 1
+            
             ofproto = datapath.ofproto
             parser = datapath.ofproto_parser
+            if in_port is None:
+                match = parser.OFPMatch(eth_dst=dst_mac)
+            else:
+                match = parser.OFPMatch(in_port=in_port, eth_dst=dst_mac)
             
-            # Delete all flows except table-miss
-            match = parser.OFPMatch()
-            mod = parser.OFPFlowMod(
-                datapath=datapath,
-                command=ofproto.OFPFC_DELETE,
-                out_port=ofproto.OFPP_ANY,
-                out_group=ofproto.OFPG_ANY,
-                priority=1,
-                match=match
-            )
-            datapath.send_msg(mod)
-            self.logger.info(f"[PRIMARY] Cleared flows on s{dpid} for rerouting")
-    
+            if new_port:
+                # An ADD with identical match and priority replaces the entry
+                actions = [parser.OFPActionOutput(new_port)]
+                self.add_flow(datapath, priority, match, actions, flush=False)
+                self._installed_flows[key] = new_port
+            else:
+                mod = parser.OFPFlowMod(
+                    datapath=datapath,
+                    command=ofproto.OFPFC_DELETE_STRICT,
+                    out_port=ofproto.OFPP_ANY,
+                    out_group=ofproto.OFPG_ANY,
+                    priority=priority,
+                    match=match
+                )
+                self._pending[datapath].append(mod)
+                del self._installed_flows[key]
+        
+        self._flush_pending()
+        self.logger.info(f"[PRIMARY] Rerouted {changed} of {len(self._installed_flows)} flows")
+
     def _restore_topology_on_recovery(self, switch_id, port):
         """Restore topology when link recovers"""
-        # Port to neighbor mapping
-        port_to_neighbor = {
-            1: {3: 2, 4: 3},           # s1
-            2: {3: 1, 4: 4, 5: 5},     # s2
-            3: {3: 1, 4: 4, 5: 6, 6: 7},     # s3
-            4: {3: 2, 4: 3, 5: 8, 6: 9},     # s4
-            5: {3: 2, 4: 10}           # s5
-        }
-        
-        neighbor = port_to_neighbor.get(switch_id, {}).get(port)
-        if neighbor and not self.topology.has_edge(switch_id, neighbor):
+        neighbor = self._get_neighbor_on_port(switch_id, port)
+        if neighbor and not self._has_link(switch_id, neighbor):
             # Restore link with original weight
             weight = 1 if neighbor in self.my_switches else 2
+            self._set_link(switch_id, neighbor, True)
             self.topology.add_edge(switch_id, neighbor, weight=weight)
             self.logger.info(f"[PRIMARY][TOPOLOGY] Restored link s{switch_id}-s{neighbor}")
+            self._recompute_routes()
             
-            # Clear flows to use new topology
-            self._clear_flows_for_rerouting()
+            # Move only the flows whose best path changed
+            self._reroute_installed_flows()
 
     def _install_path_flows(self, src_mac, dst_mac, path):
-        """Install flow entries along the entire path"""
+        """Queue flow entries along the entire path, both directions (caller flushes)"""
+        self._install_one_way(dst_mac, path)
+        # The reply takes the reverse path (link weights are symmetric), so
+        # install it now instead of waiting for its own packet-in
+        self._install_one_way(src_mac, path[::-1])
+
+    def _install_one_way(self, dst_mac, path):
+        """Queue eth_dst=dst_mac entries on every switch of path, ending at path[-1]"""
         dst_switch = path[-1]
-        dst_port = self.mac_to_port.get(dst_switch, {}).get(dst_mac)
+        dst_idx = _host_index(_mac_to_int(dst_mac))
+        dst_ports = self.mac_to_port.get(dst_switch)
+        dst_port = dst_ports[dst_idx] if dst_idx and dst_ports else 0
         
         if not dst_port:
             return
@@ -315,8 +545,10 @@ class PrimaryController(app_manager.RyuApp):
                 # Install flow for this destination
                 match = parser.OFPMatch(eth_dst=dst_mac)
                 actions = [parser.OFPActionOutput(out_port)]
-                self.add_flow(datapath, 10, match, actions)
-                self.logger.info(f"[PRIMARY] Installed flow on s{curr_switch}: dst={dst_mac} -> port {out_port}")
+                self.add_flow(datapath, 10, match, actions, flush=False)
+                self._installed_flows[(curr_switch, 10, None, dst_mac)] = out_port
+                self.logger.info("[PRIMARY] Installed flow on s%s: dst=%s -> port %s",
+                                 curr_switch, dst_mac, out_port)
         
         # Install flow on destination switch
         if dst_switch in self.datapaths:
@@ -324,43 +556,26 @@ class PrimaryController(app_manager.RyuApp):
             parser = datapath.ofproto_parser
             match = parser.OFPMatch(eth_dst=dst_mac)
             actions = [parser.OFPActionOutput(dst_port)]
-            self.add_flow(datapath, 10, match, actions)
-            self.logger.info(f"[PRIMARY] Installed flow on s{dst_switch}: dst={dst_mac} -> port {dst_port}")
+            self.add_flow(datapath, 10, match, actions, flush=False)
+            self._installed_flows[(dst_switch, 10, None, dst_mac)] = dst_port
+            self.logger.info("[PRIMARY] Installed flow on s%s: dst=%s -> port %s",
+                             dst_switch, dst_mac, dst_port)
     
     def _get_gateway_port(self, dpid, dst_mac):
         """Get appropriate gateway port for cross-domain communication"""
-        if dpid in self.gateway_switches:
-            # Direct gateway
-            if dpid == 3:
-                return 5 if dst_mac.endswith(('0b', '0c')) else 6  # s6 or s7
-            elif dpid == 4:
-                return 5 if dst_mac.endswith(('0f', '10')) else 6  # s8 or s9
-            elif dpid == 5:
-                return 4  # s10
-        else:
-            # Route to nearest gateway
-            path, cost = self._dijkstra_path(dpid, 3)  # Default to s3
-            if path and len(path) > 1:
-                next_hop = path[1]
-                return self._get_next_hop_port(dpid, next_hop)
-        
-        return None
+        alt = GATEWAY_ALT_PORTS.get(dpid)
+        if alt and (alt[0] >> (_mac_to_int(dst_mac) & 0xff)) & 1:
+            return alt[1]
+        return self._gateway_port.get(dpid)
     
     def _update_topology_on_failure(self, switch_id, port):
         """Update topology when link fails"""
-        # Port to neighbor mapping
-        port_to_neighbor = {
-            1: {3: 2, 4: 3},           # s1
-            2: {3: 1, 4: 4, 5: 5},     # s2
-            3: {3: 1, 4: 4, 5: 6, 6: 7},     # s3 fixed
-            4: {3: 2, 4: 3, 5: 8, 6: 9},     # s4 fixed
-            5: {3: 2, 4: 10}           # s5
-        }
-        
-        neighbor = port_to_neighbor.get(switch_id, {}).get(port)
-        if neighbor and self.topology.has_edge(switch_id, neighbor):
+        neighbor = self._get_neighbor_on_port(switch_id, port)
+        if neighbor and self._has_link(switch_id, neighbor):
+            self._set_link(switch_id, neighbor, False)
             self.topology.remove_edge(switch_id, neighbor)
             self.logger.warning(f"[PRIMARY][TOPOLOGY] Removed link s{switch_id}-s{neighbor}")
+            self._recompute_routes()
             
-            # Clear all flows to trigger rerouting
-            self._clear_flows_for_rerouting()
\ No newline at end of file
+            # Move only the flows whose best path changed
+            self._reroute_installed_flows()
\ No newline at end of file
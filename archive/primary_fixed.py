@@ -7,18 +7,29 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types
+from ryu.lib.packet import ether_types
 import networkx as nx
 import logging
+import struct
+
+# Ethernet header: dst MAC, src MAC, ethertype
+_ETH_HDR = struct.Struct('!6s6sH')
+
+
+def _mac_fmt(mac_bytes):
+    """Format 6 raw bytes as a colon-separated MAC string"""
+    return mac_bytes.hex(':')
+
 
 class PrimaryFixed(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
+    MY_SWITCHES = frozenset({1, 2, 3, 4, 5})  # Primary domain
 
     def __init__(self, *args, **kwargs):
         super(PrimaryFixed, self).__init__(*args, **kwargs)
         self.mac_to_port = {}
+        self._port_to_macs = {}  # (dpid, port) -> MACs learned there
         self.datapaths = {}
-        self.my_switches = {1, 2, 3, 4, 5}  # Primary domain
         self.topology = self._build_topology()
         
         logging.basicConfig(level=logging.INFO)
@@ -47,7 +58,7 @@ class PrimaryFixed(app_manager.RyuApp):
         parser = datapath.ofproto_parser
         dpid = datapath.id
         
-        if dpid not in self.my_switches:
+        if dpid not in self.MY_SWITCHES:
             return
             
         self.datapaths[dpid] = datapath
@@ -82,21 +93,26 @@ class PrimaryFixed(app_manager.RyuApp):
         in_port = msg.match['in_port']
         dpid = datapath.id
         
-        if dpid not in self.my_switches:
+        if dpid not in self.MY_SWITCHES:
             return
             
-        pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        # Only the Ethernet header is needed, skip Ryu's full protocol parse
+        dst_bytes, src_bytes, ethertype = _ETH_HDR.unpack_from(msg.data)
         
-        if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
+        if ethertype == ether_types.ETH_TYPE_LLDP:
             return
             
-        dst = eth_pkt.dst
-        src = eth_pkt.src
+        dst = _mac_fmt(dst_bytes)
+        src = _mac_fmt(src_bytes)
         
-        # Learn MAC address
-        self.mac_to_port.setdefault(dpid, {})
-        self.mac_to_port[dpid][src] = in_port
+        # Learn MAC address (the port index only changes when the MAC moves)
+        ports = self.mac_to_port.setdefault(dpid, {})
+        old_port = ports.get(src)
+        if old_port != in_port:
+            if old_port is not None:
+                self._port_to_macs[(dpid, old_port)].discard(src)
+            ports[src] = in_port
+            self._port_to_macs.setdefault((dpid, in_port), set()).add(src)
         
         # Find output port
         if dst in self.mac_to_port[dpid]:
@@ -133,7 +149,7 @@ class PrimaryFixed(app_manager.RyuApp):
         dpid = msg.datapath.id
         ofproto = msg.datapath.ofproto
         
-        if dpid not in self.my_switches:
+        if dpid not in self.MY_SWITCHES:
             return
             
         if reason == ofproto.OFPPR_ADD:
@@ -141,13 +157,8 @@ class PrimaryFixed(app_manager.RyuApp):
         elif reason == ofproto.OFPPR_DELETE:
             self.logger.warning(f"[PRIMARY-FIXED][PORT] s{dpid} port {port_no} deleted")
             # Clear MAC table entries for this port
-            if dpid in self.mac_to_port:
-                to_delete = []
-                for mac, port in self.mac_to_port[dpid].items():
-                    if port == port_no:
-                        to_delete.append(mac)
-                for mac in to_delete:
-                    del self.mac_to_port[dpid][mac]
-                    self.logger.info(f"[PRIMARY-FIXED] Removed MAC {mac} from s{dpid}")
+            for mac in self._port_to_macs.pop((dpid, port_no), ()):
+                del self.mac_to_port[dpid][mac]
+                self.logger.info(f"[PRIMARY-FIXED] Removed MAC {mac} from s{dpid}")
         elif reason == ofproto.OFPPR_MODIFY:
             self.logger.info(f"[PRIMARY-FIXED][PORT] s{dpid} port {port_no} modified")
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""
+Routing helpers shared by the primary and secondary controllers
+"""
+
+
+def floyd_warshall(dist, nxt):
+    """All-pairs shortest paths over switch ids 1..n-1, updating the tables in place
+
+    On entry dist[i][j] is the direct link cost (inf when there is no link)
+    and nxt[i][j] the neighbor j (-1 when there is no link); row/column 0 is
+    unused. On return they hold the path costs and first hops.
+    """
+    n = len(dist)
+    inf = float('inf')
+    for u in range(1, n):
+        dist[u][u] = 0
+        nxt[u][u] = u
+
+    # Relax whole rows at a time, the same shape as a vectorized
+    # min(D, D[i,k] + D[k,:]). Only map(min, ...) runs in C; the via_k
+    # and nxt[i] comprehensions are still interpreted loops, but they
+    # avoid the nested indexing of a j loop and nxt[i] is only rebuilt
+    # for rows that improved
+    for k in range(1, n):
+        dist_k = dist[k]
+        for i in range(1, n):
+            dist_i = dist[i]
+            dist_ik = dist_i[k]
+            if dist_ik == inf:
+                continue
+            via_k = [dist_ik + d for d in dist_k]
+            relaxed = list(map(min, dist_i, via_k))
+            if relaxed != dist_i:
+                nxt_ik = nxt[i][k]
+                nxt[i] = [nxt_ik if c < d else hop
+                          for c, d, hop in zip(via_k, dist_i, nxt[i])]
+                dist[i] = relaxed
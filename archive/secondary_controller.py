@@ -8,31 +8,93 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types, arp, ipv4
+from ryu.lib.packet import ether_types, arp, ipv4
+from ryu.lib import addrconv, hub
 import networkx as nx
 import logging
+import os
+import sys
+from collections import defaultdict
+import struct
+
+# Shared helpers live next to this file
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from routing_utils import floyd_warshall
+
+# Ethernet header: dst MAC, src MAC, ethertype
+_ETH_HDR = struct.Struct('!6s6sH')
+
+# Placeholder values used to locate patchable fields in the eth_dst FlowMod template
+TEMPLATE_DST_MAC = '02:00:00:00:fd:01'
+TEMPLATE_OUT_PORT = 0x0badcafe
+
+# Packet-ins for the same (switch, destination) arriving within this many
+# seconds share one routing decision and one write
+BURST_WINDOW = 0.005
+
+# Port mapping based on topology
+PORT_MAP = {
+    6: {3: 3, 7: 4},           # s6: s3->port3, s7->port4
+    7: {3: 3, 6: 4},           # s7: s3->port3, s6->port4
+    8: {4: 3, 9: 4},           # s8: s4->port3, s9->port4
+    9: {4: 3, 8: 4},           # s9: s4->port3, s8->port4
+    10: {5: 3}                 # s10: s5->port3
+}
+# Reverse of PORT_MAP: dpid -> {port: neighbor}
+PORT_TO_NEIGHBOR = {sw: {port: nbr for nbr, port in ports.items()}
+                    for sw, ports in PORT_MAP.items()}
+
+# Gateway port back to the primary domain
+GATEWAY_PORT = {
+    6: 3, 7: 3,   # Back to s3
+    8: 3, 9: 3,   # Back to s4
+    10: 3,        # Back to s5
+}
+
+
+def _mac_fmt(mac_bytes):
+    """Format 6 raw bytes as a colon-separated MAC string"""
+    return mac_bytes.hex(':')
+
 
 class SecondaryController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
 
+    # Domain configuration
+    MY_SWITCHES = frozenset({6, 7, 8, 9, 10})  # s6-s10
+    GATEWAY_SWITCHES = frozenset({6, 7, 8, 9, 10})  # All can communicate with primary
+
     def __init__(self, *args, **kwargs):
         super(SecondaryController, self).__init__(*args, **kwargs)
-        self.mac_to_port = {}
+        self.mac_to_port = {}  # (dpid, raw 6-byte MAC) -> port
         self.topology = self._build_topology()
         self.switches = set()
         self.datapaths = {}  # Store datapath objects
-        self.mac_to_switch = {}  # Track which switch a MAC is connected to
-        
-        # Domain configuration
-        self.my_switches = {6, 7, 8, 9, 10}  # s6-s10
-        self.gateway_switches = {6, 7, 8, 9, 10}  # All can communicate with primary
+        self._pending = defaultdict(list)  # datapath -> queued OpenFlow messages
+        self._action_cache = {}  # (dpid, port) -> [OFPActionOutput]
+        # (dpid, priority, in_port or None, eth_dst) -> out_port of installed flows
+        self._installed_flows = {}
+        self._burst = {}  # (dpid, dst MAC bytes) -> [(msg, in_port, src MAC bytes)]
+        self._burst_ready = hub.Event()  # set while _burst has entries waiting
+        self._clear_flows_buf = None  # serialized delete-all FlowMod, xid patched per send
+        self._table_miss_buf = None  # serialized table-miss FlowMod, xid patched per send
+        self._dst_flow_templates = {}  # priority -> (buf, dst_off, port_off)
+        self.mac_to_switch = {}  # raw 6-byte MAC -> switch it is connected to
+        self._recompute_routes()
         
         # Host mapping (MAC addresses)
-        self.secondary_hosts = set(f"00:00:00:00:00:{i:02x}" for i in range(11, 21))  # h11-h20
+        self._secondary_mask = sum(1 << i for i in range(11, 21))  # h11-h20: bit i set for MAC int i
+        # Static attachment: h(2s-1) on port 1 and h(2s) on port 2 of switch s
+        self.host_location = {f"00:00:00:00:00:{i:02x}": ((i + 1) // 2, 2 - i % 2)
+                              for i in range(11, 21)}
         
         logging.basicConfig(level=logging.INFO)
         self.logger.info("[SECONDARY] Controller started - managing s6-s10")
 
+    def start(self):
+        super(SecondaryController, self).start()
+        self.threads.append(hub.spawn(self._burst_loop))
+
     def _build_topology(self):
         """Build network topology graph"""
         G = nx.Graph()
@@ -55,8 +117,13 @@ class SecondaryController(app_manager.RyuApp):
             (6, 7, 1), (8, 9, 1)
         ]
         
+        # Dense weight matrix indexed by switch id (row/column 0 unused),
+        # inf where there is no live link
+        inf = float('inf')
+        self._w = [[inf] * 11 for _ in range(11)]
         for src, dst, weight in edges:
             G.add_edge(src, dst, weight=weight)
+            self._w[src][dst] = self._w[dst][src] = weight
             
         return G
 
@@ -64,23 +131,102 @@ class SecondaryController(app_manager.RyuApp):
     def switch_features_handler(self, ev):
         """Handle switch connection"""
         datapath = ev.msg.datapath
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
         dpid = datapath.id
         
-        if dpid in self.my_switches:
+        if dpid in self.MY_SWITCHES:
+            # A (re)connecting switch has an empty flow table (OVS restart,
+            # topology re-run), so nothing cached for it is installed any more
+            self._forget_installed_flows(dpid)
+            old_datapath = self.datapaths.get(dpid)
+            if old_datapath is not None and old_datapath is not datapath:
+                self._pending.pop(old_datapath, None)
+            
             self.switches.add(dpid)
             self.datapaths[dpid] = datapath  # Store datapath
             self.logger.info(f"[SECONDARY] Switch s{dpid} connected")
             
-            # Install table-miss flow entry
+            # Install table-miss flow entry (sent with the proactive flows)
+            self._pending[datapath].append(self._table_miss_msg(datapath))
+            self._install_proactive_flows(datapath)
+
+    def _table_miss_msg(self, datapath):
+        """Table-miss FlowMod bytes; the body is identical for every switch"""
+        if self._table_miss_buf is None:
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
             match = parser.OFPMatch()
             actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
                                             ofproto.OFPCML_NO_BUFFER)]
-            self.add_flow(datapath, 0, match, actions)
+            inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+            mod = parser.OFPFlowMod(datapath=datapath, priority=0,
+                                  match=match, instructions=inst)
+            mod.serialize()
+            self._table_miss_buf = bytes(mod.buf)
+        return self._stamp_xid(datapath, self._table_miss_buf)
+
+    def _stamp_xid(self, datapath, template):
+        """Copy a pre-serialized message and give it the datapath's next xid"""
+        buf = bytearray(template)
+        # Same bookkeeping as Datapath.set_xid
+        datapath.xid = (datapath.xid + 1) & datapath.ofproto.MAX_XID
+        struct.pack_into('!I', buf, 4, datapath.xid)
+        return buf
 
-    def add_flow(self, datapath, priority, match, actions, buffer_id=None):
-        """Add flow entry to switch"""
+    def _install_proactive_flows(self, datapath):
+        """Pre-install eth_dst flows towards every known secondary host"""
+        dpid = datapath.id
+        parser = datapath.ofproto_parser
+        for mac, (host_switch, host_port) in self.host_location.items():
+            if host_switch == dpid:
+                out_port = host_port
+            else:
+                out_port = self._next_hop_port.get(dpid, {}).get(host_switch)
+            if out_port:
+                self._add_dst_flow(datapath, 10, mac, out_port)
+        self._flush(datapath)
+        self.logger.info(f"[SECONDARY] Proactive flows installed on s{dpid}")
+
+    def _add_dst_flow(self, datapath, priority, dst_mac, out_port, in_port=None):
+        """Queue an eth_dst flow unless the same entry is already installed"""
+        key = (datapath.id, priority, in_port, dst_mac)
+        if self._installed_flows.get(key) == out_port:
+            return False
+        self._installed_flows[key] = out_port
+        if in_port is None:
+            # Path and proactive flows: patch the shared serialized template
+            template, dst_off, port_off = self._dst_flow_template(datapath, priority)
+            buf = self._stamp_xid(datapath, template)
+            buf[dst_off:dst_off + 6] = addrconv.mac.text_to_bin(dst_mac)
+            struct.pack_into('!I', buf, port_off, out_port)
+            self._pending[datapath].append(buf)
+        else:
+            match = datapath.ofproto_parser.OFPMatch(in_port=in_port, eth_dst=dst_mac)
+            self.add_flow(datapath, priority, match, self._action_out(datapath, out_port), flush=False)
+        return True
+
+    def _dst_flow_template(self, datapath, priority):
+        """Serialize the eth_dst FlowMod once and record its patchable offsets"""
+        template = self._dst_flow_templates.get(priority)
+        if template is None:
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
+            match = parser.OFPMatch(eth_dst=TEMPLATE_DST_MAC)
+            actions = [parser.OFPActionOutput(TEMPLATE_OUT_PORT)]
+            inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+            mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
+                                  match=match, instructions=inst)
+            mod.serialize()
+            buf = bytes(mod.buf)
+            template = (
+                buf,
+                buf.index(addrconv.mac.text_to_bin(TEMPLATE_DST_MAC)),
+                buf.index(struct.pack('!I', TEMPLATE_OUT_PORT)),
+            )
+            self._dst_flow_templates[priority] = template
+        return template
+
+    def add_flow(self, datapath, priority, match, actions, buffer_id=None, flush=True):
+        """Add flow entry to switch (queued only when flush=False)"""
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
         
@@ -92,134 +238,213 @@ class SecondaryController(app_manager.RyuApp):
         else:
             mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
                                   match=match, instructions=inst)
-        datapath.send_msg(mod)
+        self._pending[datapath].append(mod)
+        if flush:
+            self._flush(datapath)
+
+    def _action_out(self, datapath, port):
+        """Return a cached output action list for (datapath, port)"""
+        key = (datapath.id, port)
+        actions = self._action_cache.get(key)
+        if actions is None:
+            actions = [datapath.ofproto_parser.OFPActionOutput(port)]
+            self._action_cache[key] = actions
+        return actions
+
+    def _flush(self, datapath):
+        """Send all queued messages for a datapath in a single write"""
+        msgs = self._pending.pop(datapath, None)
+        if not msgs:
+            return
+        buf = bytearray()
+        for msg in msgs:
+            if isinstance(msg, bytearray):  # already serialized with its xid
+                buf += msg
+                continue
+            datapath.set_xid(msg)
+            msg.serialize()
+            buf += msg.buf
+        datapath.send(bytes(buf))
+
+    def _flush_pending(self):
+        """Flush the queues of every datapath that has messages waiting"""
+        for datapath in list(self._pending):
+            self._flush(datapath)
+
+    def _recompute_routes(self):
+        """Precompute all-pairs shortest paths and costs with Floyd-Warshall"""
+        n = len(self._w)
+        inf = float('inf')
+        dist = [list(row) for row in self._w]
+        nxt = [[v if row[v] != inf else -1 for v in range(n)] for row in self._w]
+        floyd_warshall(dist, nxt)
+        
+        # Same shape as before: only reachable destinations are present
+        self._paths = {}
+        self._costs = {}
+        for src in range(1, n):
+            self._paths[src] = {}
+            self._costs[src] = {}
+            for dst in range(1, n):
+                if nxt[src][dst] < 0:
+                    continue
+                path = [src]
+                while path[-1] != dst:
+                    path.append(nxt[path[-1]][dst])
+                self._paths[src][dst] = path
+                self._costs[src][dst] = dist[src][dst]
+        
+        # First-hop output port per (dpid, dst_switch) for the packet-in fast path
+        self._next_hop_port = {}
+        for s in self.MY_SWITCHES:
+            for d, path in self._paths.get(s, {}).items():
+                if len(path) > 1:
+                    self._next_hop_port.setdefault(s, {})[d] = self._get_next_hop_port(s, path[1])
+        self.logger.info(f"[SECONDARY] Routing table computed for {len(self._paths)} switches")
 
     def _dijkstra_path(self, src, dst):
-        """Calculate shortest path using Dijkstra algorithm"""
-        self.logger.info(f"[SECONDARY][DIJKSTRA] Computing path from s{src} to s{dst}")
-        try:
-            if self.topology.has_node(src) and self.topology.has_node(dst):
-                # Calculate all possible paths for comparison
-                all_paths = list(nx.all_simple_paths(self.topology, src, dst, cutoff=5))
-                self.logger.info(f"[SECONDARY][DIJKSTRA] Found {len(all_paths)} possible paths")
-                
-                # Calculate shortest path using Dijkstra
-                path = nx.shortest_path(self.topology, src, dst, weight='weight')
-                cost = nx.shortest_path_length(self.topology, src, dst, weight='weight')
-                
-                # Log the chosen path
-                path_str = " -> ".join([f"s{node}" for node in path])
-                self.logger.info(f"[SECONDARY][DIJKSTRA] ✓ OPTIMAL PATH: {path_str} (cost={cost})")
-                
-                # Log alternative paths for comparison
-                for i, alt_path in enumerate(all_paths[:3]):  # Show up to 3 alternatives
-                    if alt_path != path:
-                        alt_cost = sum(self.topology[alt_path[j]][alt_path[j+1]].get('weight', 1) 
-                                     for j in range(len(alt_path)-1))
-                        alt_str = " -> ".join([f"s{node}" for node in alt_path])
-                        self.logger.info(f"[SECONDARY][DIJKSTRA]   Alternative {i+1}: {alt_str} (cost={alt_cost})")
-                
-                return path, cost
-        except nx.NetworkXNoPath:
-            self.logger.error(f"[SECONDARY][DIJKSTRA] ✗ NO PATH found from s{src} to s{dst}")
-        except Exception as e:
-            self.logger.error(f"[SECONDARY][DIJKSTRA] Error: {e}")
-        return None, float('inf')
+        """Look up the precomputed shortest path and its cost"""
+        self.logger.info("[SECONDARY][DIJKSTRA] Computing path from s%s to s%s", src, dst)
+        path = self._paths.get(src, {}).get(dst)
+        if not path:
+            self.logger.error("[SECONDARY][DIJKSTRA] ✗ NO PATH found from s%s to s%s", src, dst)
+            return None, float('inf')
+        cost = self._costs[src][dst]
+        
+        # Log the chosen path
+        if self.logger.isEnabledFor(logging.INFO):
+            path_str = " -> ".join([f"s{node}" for node in path])
+            self.logger.info("[SECONDARY][DIJKSTRA] ✓ OPTIMAL PATH: %s (cost=%s)", path_str, cost)
+        
+        # Alternative path enumeration is exponential, keep it out of INFO runs
+        if self.logger.isEnabledFor(logging.DEBUG):
+            all_paths = list(nx.all_simple_paths(self.topology, src, dst, cutoff=5))
+            self.logger.debug(f"[SECONDARY][DIJKSTRA] Found {len(all_paths)} possible paths")
+            for i, alt_path in enumerate(all_paths[:3]):  # Show up to 3 alternatives
+                if alt_path != path:
+                    alt_cost = sum(self._w[alt_path[j]][alt_path[j+1]]
+                                 for j in range(len(alt_path)-1))
+                    alt_str = " -> ".join([f"s{node}" for node in alt_path])
+                    self.logger.debug(f"[SECONDARY][DIJKSTRA]   Alternative {i+1}: {alt_str} (cost={alt_cost})")
+        
+        return path, cost
 
     def _get_next_hop_port(self, current_switch, next_switch):
         """Get output port for next hop"""
-        # Port mapping based on topology
-        port_map = {
-            6: {3: 3, 7: 4},           # s6: s3->port3, s7->port4
-            7: {3: 3, 6: 4},           # s7: s3->port3, s6->port4
-            8: {4: 3, 9: 4},           # s8: s4->port3, s9->port4
-            9: {4: 3, 8: 4},           # s9: s4->port3, s8->port4
-            10: {5: 3}                 # s10: s5->port3
-        }
-        return port_map.get(current_switch, {}).get(next_switch, None)
-
-    def _is_cross_domain_dst(self, dst_mac):
+        return PORT_MAP.get(current_switch, {}).get(next_switch, None)
+
+    def _is_cross_domain_dst(self, dst_bytes):
         """Check if destination is in primary domain"""
-        return dst_mac not in self.secondary_hosts
+        mac = int.from_bytes(dst_bytes, 'big')
+        return mac > 0xff or not (self._secondary_mask >> mac) & 1
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def packet_in_handler(self, ev):
-        """Handle packet-in messages"""
+        """Learn the source and queue the packet for the next burst drain"""
         msg = ev.msg
         datapath = msg.datapath
-        ofproto = datapath.ofproto
-        parser = datapath.ofproto_parser
         in_port = msg.match['in_port']
         dpid = datapath.id
         
-        if dpid not in self.my_switches:
+        if dpid not in self.MY_SWITCHES:
             return
             
-        pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        # Only the Ethernet header is needed, skip Ryu's full protocol parse
+        dst_bytes, src_bytes, ethertype = _ETH_HDR.unpack_from(msg.data)
         
-        if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
+        if ethertype == ether_types.ETH_TYPE_LLDP:
             return
             
-        dst_mac = eth_pkt.dst
-        src_mac = eth_pkt.src
-        
-        self.logger.info(f"[SECONDARY] Packet: {src_mac} -> {dst_mac} on s{dpid}:{in_port}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("[SECONDARY] Packet: %s -> %s on s%s:%s",
+                             _mac_fmt(src_bytes), _mac_fmt(dst_bytes), dpid, in_port)
         
         # Learn source MAC and which switch it's on
-        self.mac_to_port.setdefault(dpid, {})
-        self.mac_to_port[dpid][src_mac] = in_port
-        self.mac_to_switch[src_mac] = dpid
+        self.mac_to_port[(dpid, src_bytes)] = in_port
+        self.mac_to_switch[src_bytes] = dpid
+        
+        # Routing is decided once per (switch, destination) per burst window
+        self._burst.setdefault((dpid, dst_bytes), []).append((msg, in_port, src_bytes))
+        self._burst_ready.set()
+
+    def _burst_loop(self):
+        """Drain queued packet-ins BURST_WINDOW seconds after the first one arrives"""
+        while True:
+            self._burst_ready.wait()
+            hub.sleep(BURST_WINDOW)
+            self._burst_ready.clear()
+            try:
+                self._drain_burst()
+            except Exception:
+                # One bad packet must not stop forwarding for good
+                self.logger.exception("[SECONDARY] Failed to drain packet-in burst")
+
+    def _drain_burst(self):
+        """Route each queued (switch, destination) once, then forward every packet"""
+        burst, self._burst = self._burst, {}
+        for (dpid, dst_bytes), entries in burst.items():
+            datapath = entries[0][0].datapath
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
+            flood = ofproto.OFPP_FLOOD
+            dst_mac = _mac_fmt(dst_bytes)
+            out_port = self._select_out_port(dpid, dst_bytes, dst_mac, entries[0][2], flood)
+            actions = self._action_out(datapath, out_port)
+            
+            for msg, in_port, _ in entries:
+                if out_port != flood:
+                    # Install flow entry (skipped if this in_port already has it)
+                    self._add_dst_flow(datapath, 1, dst_mac, out_port, in_port)
+                    
+                # Forward packet
+                data = None
+                if msg.buffer_id == ofproto.OFP_NO_BUFFER:
+                    data = msg.data
+                    
+                out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
+                                        in_port=in_port, actions=actions, data=data)
+                self._pending[datapath].append(out)
         
-        # Determine output port
-        if dst_mac in self.mac_to_port.get(dpid, {}):
+        # One write per switch for path flows, local flows and packet-outs
+        self._flush_pending()
+
+    def _select_out_port(self, dpid, dst_bytes, dst_mac, src_bytes, flood):
+        """Determine the output port on dpid, installing path flows if needed"""
+        # One hash lookup per table
+        out_port = self.mac_to_port.get((dpid, dst_bytes))
+        dst_switch = self.mac_to_switch.get(dst_bytes) if out_port is None else None
+        if out_port is not None:
             # Known local destination
-            out_port = self.mac_to_port[dpid][dst_mac]
-            self.logger.info(f"[SECONDARY] Local forwarding s{dpid}: {src_mac}->{dst_mac} via port {out_port}")
-        elif dst_mac in self.mac_to_switch:
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("[SECONDARY] Local forwarding s%s: %s->%s via port %s",
+                                 dpid, _mac_fmt(src_bytes), dst_mac, out_port)
+        elif dst_switch is not None:
             # Destination MAC is known but on a different switch
-            dst_switch = self.mac_to_switch[dst_mac]
-            if dst_switch in self.my_switches:
-                # Calculate path to destination switch
-                path, cost = self._dijkstra_path(dpid, dst_switch)
-                if path and len(path) > 1:
-                    next_hop = path[1]
-                    out_port = self._get_next_hop_port(dpid, next_hop)
-                    self.logger.info(f"[SECONDARY] Routing to s{dst_switch}: path={path} via port {out_port}")
+            if dst_switch in self.MY_SWITCHES:
+                # Precomputed first hop towards the destination switch
+                out_port = self._next_hop_port.get(dpid, {}).get(dst_switch)
+                if out_port:
+                    path = self._paths[dpid][dst_switch]
+                    self.logger.info("[SECONDARY] Routing to s%s: path=%s via port %s",
+                                     dst_switch, path, out_port)
                     
                     # Install flows along the entire path
-                    self._install_path_flows(src_mac, dst_mac, path)
+                    self._install_path_flows(dst_bytes, dst_mac, path)
                 else:
-                    out_port = ofproto.OFPP_FLOOD
+                    out_port = flood
             else:
                 # Destination is in primary domain
                 out_port = self._get_gateway_port(dpid)
-                self.logger.info(f"[SECONDARY] Cross-domain via port {out_port}")
-        elif self._is_cross_domain_dst(dst_mac):
+                self.logger.info("[SECONDARY] Cross-domain via port %s", out_port)
+        elif self._is_cross_domain_dst(dst_bytes):
             # Cross-domain communication to primary
             out_port = self._get_gateway_port(dpid)
-            self.logger.info(f"[SECONDARY] Cross-domain: s{dpid} -> Primary via port {out_port}")
+            self.logger.info("[SECONDARY] Cross-domain: s%s -> Primary via port %s", dpid, out_port)
         else:
             # Unknown destination - flood
-            out_port = ofproto.OFPP_FLOOD
-            self.logger.info(f"[SECONDARY] Flooding unknown destination {dst_mac}")
-        
-        # Install flow and forward packet
-        actions = [parser.OFPActionOutput(out_port)]
-        
-        if out_port != ofproto.OFPP_FLOOD:
-            # Install flow entry
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst_mac)
-            self.add_flow(datapath, 1, match, actions)
-            
-        # Forward packet
-        data = None
-        if msg.buffer_id == ofproto.OFP_NO_BUFFER:
-            data = msg.data
-            
-        out = parser.OFPPacketOut(datapath=datapath, buffer_id=msg.buffer_id,
-                                in_port=in_port, actions=actions, data=data)
-        datapath.send_msg(out)
+            out_port = flood
+            self.logger.info("[SECONDARY] Flooding unknown destination %s", dst_mac)
+        return out_port
 
     @set_ev_cls(ofp_event.EventOFPPortStatus, MAIN_DISPATCHER)
     def port_status_handler(self, ev):
@@ -229,11 +454,12 @@ class SecondaryController(app_manager.RyuApp):
         port = msg.desc.port_no
         reason = msg.reason
         
-        if dpid not in self.my_switches:
+        if dpid not in self.MY_SWITCHES:
             return
             
         if reason == msg.datapath.ofproto.OFPPR_DELETE:
             self.logger.warning(f"[SECONDARY][LINK-DOWN] s{dpid} port {port} failed")
+            self._forget_installed_flows(dpid)
             # Update topology by removing failed link
             self._update_topology_on_failure(dpid, port)
         elif reason == msg.datapath.ofproto.OFPPR_ADD:
@@ -241,9 +467,9 @@ class SecondaryController(app_manager.RyuApp):
             # Restore topology
             self._restore_topology_on_recovery(dpid, port)
     
-    def _clear_flows_for_rerouting(self):
-        """Clear flows on all switches to trigger rerouting"""
-        for dpid, datapath in self.datapaths.items():
+    def _clear_flows_msg(self, datapath):
+        """Delete-all FlowMod bytes; the body is identical for every switch"""
+        if self._clear_flows_buf is None:
             ofproto = datapath.ofproto
             parser = datapath.ofproto_parser
             
@@ -257,34 +483,46 @@ class SecondaryController(app_manager.RyuApp):
                 priority=1,
                 match=match
             )
-            datapath.send_msg(mod)
+            mod.serialize()
+            self._clear_flows_buf = bytes(mod.buf)
+        return self._stamp_xid(datapath, self._clear_flows_buf)
+
+    def _forget_installed_flows(self, dpid=None):
+        """Drop install-cache entries for one switch, or for all of them"""
+        if dpid is None:
+            self._installed_flows.clear()
+        else:
+            self._installed_flows = {key: port for key, port in self._installed_flows.items()
+                                     if key[0] != dpid}
+
+    def _clear_flows_for_rerouting(self):
+        """Clear flows on all switches to trigger rerouting"""
+        self._forget_installed_flows()
+        for dpid, datapath in self.datapaths.items():
+            self._pending[datapath].append(self._clear_flows_msg(datapath))
             self.logger.info(f"[SECONDARY] Cleared flows on s{dpid} for rerouting")
+            
+            # Routes were recomputed before the clear, re-push them in the same write
+            self._install_proactive_flows(datapath)
     
     def _restore_topology_on_recovery(self, switch_id, port):
         """Restore topology when link recovers"""
-        # Port to neighbor mapping for secondary switches
-        port_to_neighbor = {
-            6: {3: 3, 4: 7},           # s6
-            7: {3: 3, 4: 6},           # s7
-            8: {3: 4, 4: 9},           # s8
-            9: {3: 4, 4: 8},           # s9
-            10: {3: 5}                 # s10
-        }
-        
-        neighbor = port_to_neighbor.get(switch_id, {}).get(port)
-        if neighbor and not self.topology.has_edge(switch_id, neighbor):
+        neighbor = PORT_TO_NEIGHBOR.get(switch_id, {}).get(port)
+        if neighbor and self._w[switch_id][neighbor] == float('inf'):
             # Restore link with appropriate weight
-            weight = 1 if neighbor in self.my_switches else 2
+            weight = 1 if neighbor in self.MY_SWITCHES else 2
             self.topology.add_edge(switch_id, neighbor, weight=weight)
+            self._w[switch_id][neighbor] = self._w[neighbor][switch_id] = weight
             self.logger.info(f"[SECONDARY][TOPOLOGY] Restored link s{switch_id}-s{neighbor}")
+            self._recompute_routes()
             
             # Clear flows to use new topology
             self._clear_flows_for_rerouting()
 
-    def _install_path_flows(self, src_mac, dst_mac, path):
-        """Install flow entries along the entire path"""
+    def _install_path_flows(self, dst_bytes, dst_mac, path):
+        """Queue flow entries along the entire path (caller flushes)"""
         dst_switch = path[-1]
-        dst_port = self.mac_to_port.get(dst_switch, {}).get(dst_mac)
+        dst_port = self.mac_to_port.get((dst_switch, dst_bytes))
         
         if not dst_port:
             return
@@ -298,50 +536,31 @@ class SecondaryController(app_manager.RyuApp):
                 continue
                 
             datapath = self.datapaths[curr_switch]
-            parser = datapath.ofproto_parser
             out_port = self._get_next_hop_port(curr_switch, next_switch)
             
-            if out_port:
-                # Install flow for this destination
-                match = parser.OFPMatch(eth_dst=dst_mac)
-                actions = [parser.OFPActionOutput(out_port)]
-                self.add_flow(datapath, 10, match, actions)
-                self.logger.info(f"[SECONDARY] Installed flow on s{curr_switch}: dst={dst_mac} -> port {out_port}")
+            # Install flow for this destination
+            if out_port and self._add_dst_flow(datapath, 10, dst_mac, out_port):
+                self.logger.info("[SECONDARY] Installed flow on s%s: dst=%s -> port %s",
+                                 curr_switch, dst_mac, out_port)
         
         # Install flow on destination switch
-        if dst_switch in self.datapaths:
-            datapath = self.datapaths[dst_switch]
-            parser = datapath.ofproto_parser
-            match = parser.OFPMatch(eth_dst=dst_mac)
-            actions = [parser.OFPActionOutput(dst_port)]
-            self.add_flow(datapath, 10, match, actions)
-            self.logger.info(f"[SECONDARY] Installed flow on s{dst_switch}: dst={dst_mac} -> port {dst_port}")
+        if dst_switch in self.datapaths and \
+                self._add_dst_flow(self.datapaths[dst_switch], 10, dst_mac, dst_port):
+            self.logger.info("[SECONDARY] Installed flow on s%s: dst=%s -> port %s",
+                             dst_switch, dst_mac, dst_port)
     
     def _get_gateway_port(self, dpid):
         """Get gateway port back to primary domain"""
-        if dpid in {6, 7}:
-            return 3  # Back to s3
-        elif dpid in {8, 9}:
-            return 3  # Back to s4
-        elif dpid == 10:
-            return 3  # Back to s5
-        return None
+        return GATEWAY_PORT.get(dpid)
     
     def _update_topology_on_failure(self, switch_id, port):
         """Update topology when link fails"""
-        # Port to neighbor mapping for secondary switches
-        port_to_neighbor = {
-            6: {3: 3, 4: 7},           # s6
-            7: {3: 3, 4: 6},           # s7
-            8: {3: 4, 4: 9},           # s8
-            9: {3: 4, 4: 8},           # s9
-            10: {3: 5}                 # s10
-        }
-        
-        neighbor = port_to_neighbor.get(switch_id, {}).get(port)
-        if neighbor and self.topology.has_edge(switch_id, neighbor):
+        neighbor = PORT_TO_NEIGHBOR.get(switch_id, {}).get(port)
+        if neighbor and self._w[switch_id][neighbor] != float('inf'):
             self.topology.remove_edge(switch_id, neighbor)
+            self._w[switch_id][neighbor] = self._w[neighbor][switch_id] = float('inf')
             self.logger.warning(f"[SECONDARY][TOPOLOGY] Removed link s{switch_id}-s{neighbor}")
+            self._recompute_routes()
             
             # Clear all flows to trigger rerouting
             self._clear_flows_for_rerouting()
\ No newline at end of file
@@ -16,6 +16,7 @@ class SecondaryFixed(app_manager.RyuApp):
     def __init__(self, *args, **kwargs):
         super(SecondaryFixed, self).__init__(*args, **kwargs)
         self.mac_to_port = {}
+        self._port_to_macs = {}  # (dpid, port) -> MACs learned there
         self.datapaths = {}
         self.my_switches = {6, 7, 8, 9, 10}  # Secondary domain
         
@@ -68,7 +69,7 @@ class SecondaryFixed(app_manager.RyuApp):
             return
             
         pkt = packet.Packet(msg.data)
-        eth_pkt = pkt.get_protocols(ethernet.ethernet)[0]
+        eth_pkt = pkt.get_protocol(ethernet.ethernet)
         
         if eth_pkt.ethertype == ether_types.ETH_TYPE_LLDP:
             return
@@ -76,9 +77,14 @@ class SecondaryFixed(app_manager.RyuApp):
         dst = eth_pkt.dst
         src = eth_pkt.src
         
-        # Learn MAC address
-        self.mac_to_port.setdefault(dpid, {})
-        self.mac_to_port[dpid][src] = in_port
+        # Learn MAC address (the port index only changes when the MAC moves)
+        ports = self.mac_to_port.setdefault(dpid, {})
+        old_port = ports.get(src)
+        if old_port != in_port:
+            if old_port is not None:
+                self._port_to_macs[(dpid, old_port)].discard(src)
+            ports[src] = in_port
+            self._port_to_macs.setdefault((dpid, in_port), set()).add(src)
         
         # Find output port
         if dst in self.mac_to_port[dpid]:
@@ -123,13 +129,8 @@ class SecondaryFixed(app_manager.RyuApp):
         elif reason == ofproto.OFPPR_DELETE:
             self.logger.warning(f"[SECONDARY-FIXED][PORT] s{dpid} port {port_no} deleted")
             # Clear MAC table entries for this port
-            if dpid in self.mac_to_port:
-                to_delete = []
-                for mac, port in self.mac_to_port[dpid].items():
-                    if port == port_no:
-                        to_delete.append(mac)
-                for mac in to_delete:
-                    del self.mac_to_port[dpid][mac]
-                    self.logger.info(f"[SECONDARY-FIXED] Removed MAC {mac} from s{dpid}")
+            for mac in self._port_to_macs.pop((dpid, port_no), ()):
+                del self.mac_to_port[dpid][mac]
+                self.logger.info(f"[SECONDARY-FIXED] Removed MAC {mac} from s{dpid}")
         elif reason == ofproto.OFPPR_MODIFY:
             self.logger.info(f"[SECONDARY-FIXED][PORT] s{dpid} port {port_no} modified")
\ No newline at end of file
@@ -18,18 +18,13 @@ def test_fixed():
     
     print("\n=== Testing with FIXED Controllers ===\n")
     
-    # Start controllers
+    # Start both apps in one ryu-manager; each ignores switches outside its domain
     print("[1] Starting fixed controllers...")
     p1 = subprocess.Popen([
         'bash', '-c',
         'source /data/miniforge3/etc/profile.d/conda.sh && conda activate sdn-env && '
-        'ryu-manager --ofp-tcp-listen-port 6633 ryu-controller/primary_fixed.py'
-    ])
-    
-    p2 = subprocess.Popen([
-        'bash', '-c',
-        'source /data/miniforge3/etc/profile.d/conda.sh && conda activate sdn-env && '
-        'ryu-manager --ofp-tcp-listen-port 6634 ryu-controller/secondary_fixed.py'
+        'ryu-manager --ofp-tcp-listen-port 6633 '
+        'ryu-controller/primary_fixed.py ryu-controller/secondary_fixed.py'
     ])
     
     time.sleep(3)
@@ -37,11 +32,9 @@ def test_fixed():
     print("[2] Creating full network...")
     net = Mininet(controller=None, switch=OVSSwitch)
     
-    # Add controllers
+    # Add controller
     c1 = net.addController('c1', controller=RemoteController, 
                           ip='127.0.0.1', port=6633)
-    c2 = net.addController('c2', controller=RemoteController, 
-                          ip='127.0.0.1', port=6634)
     
     # Add all 10 switches
     switches = []
@@ -77,11 +70,9 @@ def test_fixed():
     print("[3] Starting network...")
     net.start()
     
-    # Assign controllers
-    for i in range(5):
-        switches[i].start([c1])
-    for i in range(5, 10):
-        switches[i].start([c2])
+    # Assign controller
+    for switch in switches:
+        switch.start([c1])
     
     time.sleep(3)
     
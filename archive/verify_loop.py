@@ -7,6 +7,7 @@ from mininet.net import Mininet
 from mininet.node import OVSSwitch, Controller
 from mininet.cli import CLI
 from mininet.log import setLogLevel
+import subprocess
 import time
 
 def verify_loop():
@@ -77,11 +78,18 @@ def verify_loop():
         print(f"   Result: {result[:100]}...")
     
     print("\n[5] Checking switch flow tables...")
-    for switch in [s1, s2, s3, s4]:
-        flows = switch.cmd('ovs-ofctl dump-flows', switch.name)
+    # Start all dumps at once, then collect; OVS bridges live in the root
+    # namespace so there is no need to go through each switch's shell
+    procs = [(switch, subprocess.Popen(['ovs-ofctl', 'dump-flows', switch.name],
+                                       stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE))
+             for switch in [s1, s2, s3, s4]]
+    for switch, proc in procs:
+        flows = proc.communicate()[0].decode(errors='replace')
         print(f"\n   {switch.name} flows:")
         # Show first line of flows
-        first_flow = flows.split('\n')[1] if len(flows.split('\n')) > 1 else "No flows"
+        lines = flows.split('\n')
+        first_flow = lines[1] if len(lines) > 1 else "No flows"
         print(f"   {first_flow[:80]}...")
     
     print("\n" + "="*60)
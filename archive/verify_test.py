@@ -6,11 +6,16 @@ VERIFICATION TEST - Show REAL ping output, no fake success
 import time
 import subprocess
 import os
+import sys
 from mininet.net import Mininet
 from mininet.node import RemoteController, OVSSwitch
 from mininet.cli import CLI
 from mininet.log import setLogLevel
 
+# Shared ping helpers live next to the topology scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mininet'))
+from ping_utils import packet_loss, run_pings
+
 def verify_test():
     # Kill everything first
     os.system("sudo mn -c 2>/dev/null")
@@ -95,37 +100,23 @@ def verify_test():
     print("RAW PING TESTS - EXACT OUTPUT")
     print("-"*60)
     
-    # Test 1: Same switch
-    print("\n>>> TEST 1: h1 ping -c 2 h2 (same switch)")
-    print("Command: h1.cmd('ping -c 2 -W 1 10.0.0.2')")
-    result = h1.cmd('ping -c 2 -W 1 10.0.0.2')
-    print("RAW OUTPUT:")
-    print(result)
-    print(">>> Packet loss check: ", "0% packet loss" in result)
-    
-    # Test 2: Different switches  
-    print("\n>>> TEST 2: h1 ping -c 2 h3 (different switches)")
-    print("Command: h1.cmd('ping -c 2 -W 1 10.0.0.3')")
-    result = h1.cmd('ping -c 2 -W 1 10.0.0.3')
-    print("RAW OUTPUT:")
-    print(result)
-    print(">>> Packet loss check: ", "0% packet loss" in result)
-    
-    # Test 3: Cross-domain
-    print("\n>>> TEST 3: h1 ping -c 2 h6 (cross-domain)")
-    print("Command: h1.cmd('ping -c 2 -W 1 10.0.0.6')")
-    result = h1.cmd('ping -c 2 -W 1 10.0.0.6')
-    print("RAW OUTPUT:")
-    print(result)
-    print(">>> Packet loss check: ", "0% packet loss" in result)
-    
-    # Test 4: Secondary domain
-    print("\n>>> TEST 4: h6 ping -c 2 h7 (secondary domain)")
-    print("Command: h6.cmd('ping -c 2 -W 1 10.0.0.7')")
-    result = h6.cmd('ping -c 2 -W 1 10.0.0.7')
-    print("RAW OUTPUT:")
-    print(result)
-    print(">>> Packet loss check: ", "0% packet loss" in result)
+    # Tests 1-4 are independent, so run the pings concurrently and print
+    # the raw output afterwards in order. host.cmd() shares one shell per
+    # host (h1 is used three times), so each ping gets its own popen().
+    tests = [
+        ("TEST 1", h1, 'h2', '10.0.0.2', 'same switch'),
+        ("TEST 2", h1, 'h3', '10.0.0.3', 'different switches'),
+        ("TEST 3", h1, 'h6', '10.0.0.6', 'cross-domain'),
+        ("TEST 4", h6, 'h7', '10.0.0.7', 'secondary domain'),
+    ]
+    results = run_pings([(host, ip) for _, host, _, ip, _ in tests], count=2)
+    
+    for (name, host, target, ip, desc), result in zip(tests, results):
+        print(f"\n>>> {name}: {host.name} ping -c 2 {target} ({desc})")
+        print(f"Command: {host.name}.popen('ping -c 2 -W 1 {ip}')")
+        print("RAW OUTPUT:")
+        print(result)
+        print(f">>> Packet loss: {packet_loss(result)}%")
     
     # Test 5: Link down
     print("\n>>> TEST 5: Breaking link s1-s3")
@@ -138,7 +129,7 @@ def verify_test():
     result = h1.cmd('ping -c 2 -W 1 10.0.0.3')
     print("RAW OUTPUT:")
     print(result)
-    print(">>> Packet loss check: ", "0% packet loss" in result)
+    print(f">>> Packet loss: {packet_loss(result)}%")
     
     # Check flow table
     print("\n>>> FLOW TABLE CHECK on s1:")
@@ -9,125 +9,201 @@ from ryu.controller import ofp_event
 from ryu.controller.handler import CONFIG_DISPATCHER, MAIN_DISPATCHER
 from ryu.controller.handler import set_ev_cls
 from ryu.ofproto import ofproto_v1_3
-from ryu.lib.packet import packet, ethernet, ether_types, arp
-import networkx as nx
-from collections import defaultdict
+from ryu.lib import hub
+from ryu.lib.packet import ether_types, arp
+from array import array
+from collections import defaultdict, OrderedDict
+from functools import lru_cache
+import logging
+import os
+import socket
+import struct
+import subprocess
+import tempfile
 import time
 
 
+# Ethernet header (dst, src, ethertype) and ARP body following it
+_ETH_HDR = struct.Struct('!6s6sH')
+_ARP_BODY = struct.Struct('!HHBBH6s4s6s4s')
+
+# Placeholder values serialized into the FlowMod template and located by value
+TEMPLATE_DST_MAC = '02:00:00:00:fd:01'
+TEMPLATE_OUT_PORT = 0x0badcafe
+
+# Opt-in: load static flows with one `ovs-ofctl replace-flows` per switch
+# instead of per-flow OpenFlow messages. Only valid when the bridges s<dpid>
+# are local to the controller (same host/container as Mininet), so it is
+# enabled explicitly with FINAL_DIJKSTRA_OVS_OFCTL=1 rather than guessed
+USE_OVS_OFCTL = os.environ.get('FINAL_DIJKSTRA_OVS_OFCTL') == '1'
+
+# 10-switch graph with loops (s1, s2, weight), same as the topology file
+TOPOLOGY_EDGES = [
+    # Ring topology (main 10-switch loop)
+    (1, 2, 1), (2, 3, 1), (3, 4, 1), (4, 5, 1), (5, 6, 1),
+    (6, 7, 1), (7, 8, 1), (8, 9, 1), (9, 10, 1), (10, 1, 1),
+
+    # Cross connections (diagonal paths)
+    (1, 6, 2), (2, 7, 2), (3, 8, 2), (4, 9, 2), (5, 10, 2),
+
+    # Additional mesh connections
+    (1, 4, 3), (2, 5, 3), (3, 6, 3), (7, 10, 3), (8, 1, 3),
+
+    # More crosses
+    (2, 9, 4), (3, 10, 4),
+]
+
+# Dijkstra next hop {(src_dpid, dst_dpid): (next_hop_dpid, out_port)} over
+# TOPOLOGY_EDGES. Ports 1,2 are hosts; neighbor ports start at 3 in the order
+# each switch's links appear in TOPOLOGY_EDGES. The graph is static, so this
+# is computed offline: regenerate with `python final_dijkstra_graph.py`.
+NEXT_HOP = {
+    (1, 2): (2, 3), (1, 3): (2, 3), (1, 4): (4, 6), (1, 5): (10, 4), (1, 6): (6, 5), (1, 7): (2, 3), (1, 8): (8, 7), (1, 9): (10, 4), (1, 10): (10, 4),
+    (2, 1): (1, 3), (2, 3): (3, 4), (2, 4): (3, 4), (2, 5): (5, 6), (2, 6): (1, 3), (2, 7): (7, 5), (2, 8): (3, 4), (2, 9): (1, 3), (2, 10): (1, 3),
+    (3, 1): (2, 3), (3, 2): (2, 3), (3, 4): (4, 4), (3, 5): (4, 4), (3, 6): (6, 6), (3, 7): (2, 3), (3, 8): (8, 5), (3, 9): (4, 4), (3, 10): (2, 3),
+    (4, 1): (1, 6), (4, 2): (3, 3), (4, 3): (3, 3), (4, 5): (5, 4), (4, 6): (5, 4), (4, 7): (5, 4), (4, 8): (3, 3), (4, 9): (9, 5), (4, 10): (5, 4),
+    (5, 1): (6, 4), (5, 2): (2, 6), (5, 3): (4, 3), (5, 4): (4, 3), (5, 6): (6, 4), (5, 7): (6, 4), (5, 8): (6, 4), (5, 9): (4, 3), (5, 10): (10, 5),
+    (6, 1): (1, 5), (6, 2): (7, 4), (6, 3): (3, 6), (6, 4): (5, 3), (6, 5): (5, 3), (6, 7): (7, 4), (6, 8): (7, 4), (6, 9): (7, 4), (6, 10): (5, 3),
+    (7, 1): (6, 3), (7, 2): (2, 5), (7, 3): (8, 4), (7, 4): (6, 3), (7, 5): (6, 3), (7, 6): (6, 3), (7, 8): (8, 4), (7, 9): (8, 4), (7, 10): (10, 6),
+    (8, 1): (1, 6), (8, 2): (7, 3), (8, 3): (3, 5), (8, 4): (9, 4), (8, 5): (7, 3), (8, 6): (7, 3), (8, 7): (7, 3), (8, 9): (9, 4), (8, 10): (9, 4),
+    (9, 1): (10, 4), (9, 2): (10, 4), (9, 3): (8, 3), (9, 4): (4, 5), (9, 5): (10, 4), (9, 6): (8, 3), (9, 7): (8, 3), (9, 8): (8, 3), (9, 10): (10, 4),
+    (10, 1): (1, 4), (10, 2): (1, 4), (10, 3): (1, 4), (10, 4): (9, 3), (10, 5): (5, 5), (10, 6): (1, 4), (10, 7): (7, 6), (10, 8): (9, 3), (10, 9): (9, 3),
+}
+
+# Ports 1,2 on every switch are host ports
+HOST_PORTS = (1, 2)
+BROADCAST_MAC = 'ff:ff:ff:ff:ff:ff'
+
+# ALL group used instead of OFPP_FLOOD, which would loop around the rings
+FLOOD_GROUP_ID = 1
+
+
+def _build_port_map(edges):
+    """{dpid: {neighbor: port}}, neighbor ports numbered from 3 in edge order"""
+    port_map = defaultdict(dict)
+    for s1, s2, weight in edges:
+        port_map[s1][s2] = len(port_map[s1]) + 3
+        port_map[s2][s1] = len(port_map[s2]) + 3
+    return dict(port_map)
+
+
+def _build_flood_ports(root=1):
+    """{dpid: [ports]} flooding to hosts and along the shortest-path tree to root"""
+    flood = {dpid: list(HOST_PORTS) for dpid in PORT_MAP}
+    for dpid in PORT_MAP:
+        if dpid != root:
+            parent = NEXT_HOP[(dpid, root)][0]
+            flood[dpid].append(PORT_MAP[dpid][parent])
+            flood[parent].append(PORT_MAP[parent][dpid])
+    return flood
+
+
+PORT_MAP = _build_port_map(TOPOLOGY_EDGES)
+FLOOD_PORTS = _build_flood_ports()
+
+
+@lru_cache(maxsize=1024)
+def _mac_str(raw):
+    """Raw 6-byte MAC -> 'xx:xx:xx:xx:xx:xx'"""
+    return ':'.join('%02x' % b for b in raw)
+
+
+@lru_cache(maxsize=1024)
+def _mac_bin(mac):
+    """'xx:xx:xx:xx:xx:xx' -> raw 6-byte MAC"""
+    return bytes.fromhex(mac.replace(':', ''))
+
+
 class FinalDijkstraGraphController(app_manager.RyuApp):
     OFP_VERSIONS = [ofproto_v1_3.OFP_VERSION]
 
     def __init__(self, *args, **kwargs):
         super(FinalDijkstraGraphController, self).__init__(*args, **kwargs)
         
-        # MAC learning table {dpid: {mac: port}}
-        self.mac_to_port = defaultdict(dict)
+        # MAC learning table {dpid: {mac: port}}, each switch LRU-bounded
+        self.mac_to_port = defaultdict(OrderedDict)
+        self._mac_table_max = 4096
         
-        # Complete host database (all 20 hosts for 10-switch topology)
+        # Complete host database {ip: (mac, dpid, port)} for the 10-switch topology:
+        # h<i> is 10.0.0.<i> / 00:00:00:00:00:<i> on s((i-1)//2+1), ports 1 and 2
         self.host_db = {
-            '10.0.0.1': ('00:00:00:00:00:01', 1, 1),   # h1 at s1 port 1
-            '10.0.0.2': ('00:00:00:00:00:02', 1, 2),   # h2 at s1 port 2
-            '10.0.0.3': ('00:00:00:00:00:03', 2, 1),   # h3 at s2 port 1
-            '10.0.0.4': ('00:00:00:00:00:04', 2, 2),   # h4 at s2 port 2
-            '10.0.0.5': ('00:00:00:00:00:05', 3, 1),   # h5 at s3 port 1
-            '10.0.0.6': ('00:00:00:00:00:06', 3, 2),   # h6 at s3 port 2
-            '10.0.0.7': ('00:00:00:00:00:07', 4, 1),   # h7 at s4 port 1
-            '10.0.0.8': ('00:00:00:00:00:08', 4, 2),   # h8 at s4 port 2
-            '10.0.0.9': ('00:00:00:00:00:09', 5, 1),   # h9 at s5 port 1
-            '10.0.0.10': ('00:00:00:00:00:0a', 5, 2),  # h10 at s5 port 2
-            '10.0.0.11': ('00:00:00:00:00:0b', 6, 1),  # h11 at s6 port 1
-            '10.0.0.12': ('00:00:00:00:00:0c', 6, 2),  # h12 at s6 port 2
-            '10.0.0.13': ('00:00:00:00:00:0d', 7, 1),  # h13 at s7 port 1
-            '10.0.0.14': ('00:00:00:00:00:0e', 7, 2),  # h14 at s7 port 2
-            '10.0.0.15': ('00:00:00:00:00:0f', 8, 1),  # h15 at s8 port 1
-            '10.0.0.16': ('00:00:00:00:00:10', 8, 2),  # h16 at s8 port 2
-            '10.0.0.17': ('00:00:00:00:00:11', 9, 1),  # h17 at s9 port 1
-            '10.0.0.18': ('00:00:00:00:00:12', 9, 2),  # h18 at s9 port 2
-            '10.0.0.19': ('00:00:00:00:00:13', 10, 1), # h19 at s10 port 1
-            '10.0.0.20': ('00:00:00:00:00:14', 10, 2), # h20 at s10 port 2
+            f'10.0.0.{i}': (f'00:00:00:00:00:{i:02x}', (i - 1) // 2 + 1, (i - 1) % 2 + 1)
+            for i in range(1, 21)
         }
         
-        # Build topology graph for Dijkstra
-        self.graph = self._build_10_switch_graph()
+        # Column view of host_db: index i is the same host in every column
+        self._host_macs = [mac for mac, dpid, port in self.host_db.values()]
+        self._host_dpids = array('B', (dpid for mac, dpid, port in self.host_db.values()))
+        self._host_ports = array('B', (port for mac, dpid, port in self.host_db.values()))
         
-        # Port mapping for 10-switch graph topology 
-        # {dpid: {neighbor_dpid: port}}
-        self.port_mapping = self._build_port_mapping()
+        # Reverse index {mac: dpid} so host lookups don't scan host_db
+        self.mac_to_dpid = dict(zip(self._host_macs, self._host_dpids))
         
         # ARP proxy table
         self.arp_table = {}
         
-        # ARP request rate limiting {(src_ip, dst_ip): timestamp}
-        self.arp_timestamps = {}
+        # ARP request rate limiting {(packed src_ip, dst_ip): monotonic ns}, LRU-bounded
+        self.arp_timestamps = OrderedDict()
+        self._arp_cache_max = 4096
+        
+        # Serialized eth_dst FlowMods {priority: (buf, dst_off, port_off)}
+        self._flow_templates = {}
+        
+        # Reactive flow matches {(in_port, eth_dst): OFPMatch}, LRU-bounded
+        self._match_cache = OrderedDict()
+        self._match_cache_max = 2048
+        
+        # Proxy ARP replies waiting for the next flush {datapath: [bytearray]};
+        # the event wakes the flush thread when the first one is queued
+        self._pending_out = defaultdict(list)
+        self._arp_flush_ready = hub.Event()
+        
+        # 42-byte ARP reply frame; send_arp_reply only patches the addresses
+        self._arp_template = bytearray(_ETH_HDR.size + _ARP_BODY.size)
+        _ETH_HDR.pack_into(self._arp_template, 0, b'', b'', ether_types.ETH_TYPE_ARP)
+        _ARP_BODY.pack_into(self._arp_template, _ETH_HDR.size,
+                            1, 0x0800, 6, 4, arp.ARP_REPLY, b'', b'', b'', b'')
         
         self.logger.info("=== Final Dijkstra Graph Controller Started ===")
         self.logger.info("Simple L2 learning with controlled ARP flooding")
-        if self.graph:
-            self.logger.info("10-Switch Graph: %d nodes, %d edges", 
-                           self.graph.number_of_nodes(), 
-                           self.graph.number_of_edges())
-            self.logger.info("Graph edges: %s", list(self.graph.edges))
+        self.logger.info("10-Switch Graph: %d nodes, %d edges",
+                         len({dpid for edge in TOPOLOGY_EDGES for dpid in edge[:2]}),
+                         len(TOPOLOGY_EDGES))
+        self.logger.info("Graph edges: %s", [edge[:2] for edge in TOPOLOGY_EDGES])
         self.logger.info("Host database: %d hosts", len(self.host_db))
 
-    def _build_10_switch_graph(self):
-        """Build 10-switch graph topology for Dijkstra calculations"""
-        try:
-            G = nx.Graph()
-            
-            # Add 10 switches
-            for i in range(1, 11):
-                G.add_node(i)
-            
-            # Add edges for graph topology with loops (same as topology file)
-            edges = [
-                # Ring topology (main 10-switch loop)
-                (1, 2, 1), (2, 3, 1), (3, 4, 1), (4, 5, 1), (5, 6, 1),
-                (6, 7, 1), (7, 8, 1), (8, 9, 1), (9, 10, 1), (10, 1, 1),
-                
-                # Cross connections (diagonal paths)
-                (1, 6, 2), (2, 7, 2), (3, 8, 2), (4, 9, 2), (5, 10, 2),
-                
-                # Additional mesh connections  
-                (1, 4, 3), (2, 5, 3), (3, 6, 3), (7, 10, 3), (8, 1, 3),
-                
-                # More crosses
-                (2, 9, 4), (3, 10, 4),
-            ]
-            
-            for s1, s2, weight in edges:
-                G.add_edge(s1, s2, weight=weight)
-            
-            return G
-        except ImportError:
-            self.logger.warning("NetworkX not available, using simple L2")
-            return None
-
-    def _build_port_mapping(self):
-        """Build static port mapping for 10-switch topology"""
-        # Simplified mapping: host ports 1,2, switch ports start from 3
-        mapping = {}
-        for dpid in range(1, 11):
-            mapping[dpid] = {}
-            port = 3  # Start from port 3 (ports 1,2 for hosts)
-            
-            # Add all neighbors from graph
-            if self.graph and dpid in self.graph:
-                for neighbor in self.graph.neighbors(dpid):
-                    mapping[dpid][neighbor] = port
-                    port += 1
-                    
-        return mapping
+    def start(self):
+        super(FinalDijkstraGraphController, self).start()
+        self.threads.append(hub.spawn(self._arp_flush_loop))
 
     @set_ev_cls(ofp_event.EventOFPSwitchFeatures, CONFIG_DISPATCHER)
     def switch_features_handler(self, ev):
         """Handle switch connection"""
         datapath = ev.msg.datapath
+
+        self.logger.info("Switch %s connected", datapath.id)
+
+        if USE_OVS_OFCTL:
+            # The ovs-ofctl runs happen in their own green thread so the
+            # handshake handler does not wait on subprocesses
+            hub.spawn(self._load_static_flows, datapath)
+            return
+
+        self._install_static_flows(datapath)
+
+    def _load_static_flows(self, datapath):
+        """Whole static table via ovs-ofctl, falling back to OpenFlow messages"""
+        try:
+            if self._replace_flows_from_file(datapath.id):
+                return
+        except Exception:
+            self.logger.exception("ovs-ofctl load failed on s%s", datapath.id)
+        self._install_static_flows(datapath)
+
+    def _install_static_flows(self, datapath):
+        """Table-miss, flood group and host flows as OpenFlow messages"""
         ofproto = datapath.ofproto
         parser = datapath.ofproto_parser
-        dpid = datapath.id
-
-        self.logger.info("Switch %s connected", dpid)
 
         # Install table-miss flow entry
         match = parser.OFPMatch()
@@ -135,6 +211,124 @@ class FinalDijkstraGraphController(app_manager.RyuApp):
                                          ofproto.OFPCML_NO_BUFFER)]
         self.add_flow(datapath, 0, match, actions)
 
+        # Broadcasts stay in the switch, except ARP requests for the proxy
+        self._install_flood_group(datapath)
+
+        # Topology and hosts are static, so route every known MAC up front
+        self._install_host_flows(datapath)
+
+    def _install_flood_group(self, datapath):
+        """Install the flood group plus the broadcast flows that use it"""
+        ofproto = datapath.ofproto
+        parser = datapath.ofproto_parser
+
+        # A reconnecting switch may still hold the group; delete it first so
+        # the add below does not fail with OFPGMFC_GROUP_EXISTS
+        datapath.send_msg(parser.OFPGroupMod(datapath, ofproto.OFPGC_DELETE,
+                                             ofproto.OFPGT_ALL, FLOOD_GROUP_ID))
+        buckets = [parser.OFPBucket(actions=[parser.OFPActionOutput(port)])
+                   for port in FLOOD_PORTS.get(datapath.id, HOST_PORTS)]
+        datapath.send_msg(parser.OFPGroupMod(datapath, ofproto.OFPGC_ADD,
+                                             ofproto.OFPGT_ALL, FLOOD_GROUP_ID,
+                                             buckets))
+
+        match = parser.OFPMatch(eth_type=ether_types.ETH_TYPE_ARP,
+                                eth_dst=BROADCAST_MAC)
+        actions = [parser.OFPActionOutput(ofproto.OFPP_CONTROLLER,
+                                         ofproto.OFPCML_NO_BUFFER)]
+        self.add_flow(datapath, 2, match, actions)
+
+        match = parser.OFPMatch(eth_dst=BROADCAST_MAC)
+        self.add_flow(datapath, 1, match, [parser.OFPActionGroup(FLOOD_GROUP_ID)])
+
+    def _host_flow_entries(self, dpid):
+        """Yield (mac, out_port) for every host reachable from a switch"""
+        for mac, dst_dpid, host_port in zip(self._host_macs, self._host_dpids,
+                                            self._host_ports):
+            if dst_dpid == dpid:
+                yield mac, host_port
+            else:
+                out_port = NEXT_HOP.get((dpid, dst_dpid), (None, None))[1]
+                if out_port is not None:
+                    yield mac, out_port
+
+    def _install_host_flows(self, datapath):
+        """Install proactive eth_dst flows for every host in host_db"""
+        dpid = datapath.id
+        installed = 0
+
+        for mac, out_port in self._host_flow_entries(dpid):
+            datapath.send(self._make_flow_bytes(datapath, 5, _mac_bin(mac), out_port))
+            installed += 1
+
+        self.logger.info("Installed %d proactive host flows on s%s", installed, dpid)
+
+    def _generate_flow_file(self, dpid):
+        """Write the static flow table of a switch in ovs-ofctl syntax"""
+        path = os.path.join(tempfile.gettempdir(), f'final_dijkstra_s{dpid}.flows')
+        lines = [
+            'priority=0,actions=CONTROLLER:65535',
+            f'priority=2,arp,dl_dst={BROADCAST_MAC},actions=CONTROLLER:65535',
+            f'priority=1,dl_dst={BROADCAST_MAC},actions=group:{FLOOD_GROUP_ID}',
+        ]
+        lines.extend(f'priority=5,dl_dst={mac},actions=output:{out_port}'
+                     for mac, out_port in self._host_flow_entries(dpid))
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def _replace_flows_from_file(self, dpid):
+        """Load the static flow table via ovs-ofctl; False means use OpenFlow"""
+        path = self._generate_flow_file(dpid)
+        buckets = ','.join(f'bucket=output:{port}'
+                           for port in FLOOD_PORTS.get(dpid, HOST_PORTS))
+        # The flood group has to exist before flows that reference it
+        for args in (['del-groups', f's{dpid}', f'group_id={FLOOD_GROUP_ID}'],
+                     ['add-group', f's{dpid}',
+                      f'group_id={FLOOD_GROUP_ID},type=all,{buckets}'],
+                     ['replace-flows', f's{dpid}', path]):
+            result = subprocess.run(['ovs-ofctl', '-O', 'OpenFlow13'] + args,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if result.returncode != 0:
+                self.logger.warning("ovs-ofctl %s failed on s%s: %s", args[0], dpid,
+                                    result.stderr.decode(errors='replace').strip())
+                return False
+        self.logger.info("Loaded static flow table on s%s from %s", dpid, path)
+        return True
+
+    def _flow_template(self, datapath, priority):
+        """Serialize the eth_dst FlowMod once and record its patchable offsets"""
+        template = self._flow_templates.get(priority)
+        if template is None:
+            ofproto = datapath.ofproto
+            parser = datapath.ofproto_parser
+            match = parser.OFPMatch(eth_dst=TEMPLATE_DST_MAC)
+            actions = [parser.OFPActionOutput(TEMPLATE_OUT_PORT)]
+            inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
+            mod = parser.OFPFlowMod(datapath=datapath, priority=priority,
+                                    match=match, instructions=inst)
+            mod.serialize()
+            buf = bytes(mod.buf)
+            template = (
+                buf,
+                buf.index(_mac_bin(TEMPLATE_DST_MAC)),
+                buf.index(struct.pack('!I', TEMPLATE_OUT_PORT)),
+            )
+            self._flow_templates[priority] = template
+        return template
+
+    def _make_flow_bytes(self, datapath, priority, dst_mac, out_port):
+        """eth_dst -> output FlowMod patched from the template (dst_mac raw)"""
+        template, dst_off, port_off = self._flow_template(datapath, priority)
+        buf = bytearray(template)
+        # Fixed-size fields, so msg_len is unchanged; only the xid needs a
+        # fresh value, with the same bookkeeping as Datapath.set_xid
+        datapath.xid = (datapath.xid + 1) & datapath.ofproto.MAX_XID
+        struct.pack_into('!I', buf, 4, datapath.xid)
+        buf[dst_off:dst_off + 6] = dst_mac
+        struct.pack_into('!I', buf, port_off, out_port)
+        return buf
+
     def add_flow(self, datapath, priority, match, actions, buffer_id=None, idle_timeout=0):
         """Add flow to switch"""
         ofproto = datapath.ofproto
@@ -142,7 +336,7 @@ class FinalDijkstraGraphController(app_manager.RyuApp):
 
         inst = [parser.OFPInstructionActions(ofproto.OFPIT_APPLY_ACTIONS, actions)]
         
-        if buffer_id:
+        if buffer_id is not None:
             mod = parser.OFPFlowMod(datapath=datapath, buffer_id=buffer_id,
                                    priority=priority, match=match,
                                    instructions=inst, idle_timeout=idle_timeout)
@@ -153,22 +347,16 @@ class FinalDijkstraGraphController(app_manager.RyuApp):
         datapath.send_msg(mod)
 
     def get_dijkstra_next_hop(self, src_dpid, dst_dpid):
-        """Get next hop using Dijkstra algorithm"""
-        if not self.graph or src_dpid == dst_dpid:
-            return None
-            
-        try:
-            path = nx.shortest_path(self.graph, src_dpid, dst_dpid, weight='weight')
-            if len(path) > 1:
-                next_hop = path[1]
-                port = self.port_mapping.get(src_dpid, {}).get(next_hop)
-                self.logger.debug("Dijkstra s%s->s%s: path=%s, next_hop=s%s, port=%s", 
-                               src_dpid, dst_dpid, path, next_hop, port)
-                return next_hop, port
-        except:
-            self.logger.warning("No path found from s%s to s%s", src_dpid, dst_dpid)
-            
-        return None, None
+        """Get next hop from the precomputed Dijkstra table"""
+        next_hop = NEXT_HOP.get((src_dpid, dst_dpid))
+        if next_hop is None:
+            if src_dpid != dst_dpid:
+                self.logger.warning("No path found from s%s to s%s", src_dpid, dst_dpid)
+            return None, None
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Dijkstra s%s->s%s: next_hop=s%s, port=%s",
+                              src_dpid, dst_dpid, *next_hop)
+        return next_hop
 
     @set_ev_cls(ofp_event.EventOFPPacketIn, MAIN_DISPATCHER)
     def _packet_in_handler(self, ev):
@@ -180,54 +368,69 @@ class FinalDijkstraGraphController(app_manager.RyuApp):
         in_port = msg.match['in_port']
         dpid = datapath.id
 
-        pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        data = msg.data
+        if len(data) < _ETH_HDR.size:
+            return
+        dst_raw, src_raw, ethertype = _ETH_HDR.unpack_from(data)
 
-        if eth.ethertype == ether_types.ETH_TYPE_LLDP:
+        if ethertype == ether_types.ETH_TYPE_LLDP:
             # ignore lldp packet
             return
 
-        dst = eth.dst
-        src = eth.src
+        dst = _mac_str(dst_raw)
+        src = _mac_str(src_raw)
 
-        # Learn source MAC address
-        self.mac_to_port[dpid][src] = in_port
+        # Learn source MAC address (evict the stalest entry past the cap)
+        mac_table = self.mac_to_port[dpid]
+        mac_table[src] = in_port
+        mac_table.move_to_end(src)
+        if len(mac_table) > self._mac_table_max:
+            mac_table.popitem(last=False)
 
         # Handle ARP with proxy capabilities
-        if eth.ethertype == ether_types.ETH_TYPE_ARP:
-            arp_pkt = pkt.get_protocol(arp.arp)
-            if arp_pkt:
-                # Update ARP table
-                self.arp_table[arp_pkt.src_ip] = arp_pkt.src_mac
-                
-                if arp_pkt.opcode == arp.ARP_REQUEST:
-                    self.logger.info("ARP Request: %s->%s at s%d", 
-                                   arp_pkt.src_ip, arp_pkt.dst_ip, dpid)
-                    
-                    # Rate limit ARP requests
-                    current_time = time.time()
-                    arp_key = (arp_pkt.src_ip, arp_pkt.dst_ip)
-                    
-                    if arp_key in self.arp_timestamps:
-                        if current_time - self.arp_timestamps[arp_key] < 1:
-                            return
-                    
-                    self.arp_timestamps[arp_key] = current_time
-                    
-                    # ARP Proxy using host database
-                    if arp_pkt.dst_ip in self.host_db:
-                        dst_mac, dst_dpid, dst_port = self.host_db[arp_pkt.dst_ip]
-                        self.logger.info("ARP Proxy reply for %s", arp_pkt.dst_ip)
-                        self.send_arp_reply(datapath, in_port, arp_pkt, dst_mac)
-                        return
+        if (ethertype == ether_types.ETH_TYPE_ARP and
+                len(data) >= _ETH_HDR.size + _ARP_BODY.size):
+            (_, _, _, _, opcode,
+             sha, spa, _, tpa) = _ARP_BODY.unpack_from(data, _ETH_HDR.size)
+            src_ip = socket.inet_ntoa(spa)
+
+            # Update ARP table
+            self.arp_table[src_ip] = _mac_str(sha)
+
+            if opcode == arp.ARP_REQUEST:
+                dst_ip = socket.inet_ntoa(tpa)
+                self.logger.info("ARP Request: %s->%s at s%d",
+                                 src_ip, dst_ip, dpid)
+
+                # Rate limit ARP requests (one per pair per second)
+                now = time.monotonic_ns()
+                arp_key = (spa, tpa)
+
+                last = self.arp_timestamps.get(arp_key)
+                if last is not None and now - last < 1_000_000_000:
+                    return
+
+                self.arp_timestamps[arp_key] = now
+                self.arp_timestamps.move_to_end(arp_key)
+                if len(self.arp_timestamps) > self._arp_cache_max:
+                    self.arp_timestamps.popitem(last=False)
+
+                # ARP Proxy using host database
+                if dst_ip in self.host_db:
+                    dst_mac, dst_dpid, dst_port = self.host_db[dst_ip]
+                    self.logger.info("ARP Proxy reply for %s", dst_ip)
+                    self.send_arp_reply(datapath, in_port, sha, spa, tpa,
+                                        _mac_bin(dst_mac))
+                    return
 
         # Determine output port
         out_port = None
         
-        if dst in self.mac_to_port[dpid]:
+        if dst in mac_table:
             # Direct forwarding (same switch)
-            out_port = self.mac_to_port[dpid][dst]
-            self.logger.debug("Direct: %s at s%d port %d", dst, dpid, out_port)
+            out_port = mac_table[dst]
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Direct: %s at s%d port %d", dst, dpid, out_port)
         else:
             # Try to route to destination switch using Dijkstra
             dst_dpid = self._find_host_switch(dst)
@@ -235,26 +438,29 @@ class FinalDijkstraGraphController(app_manager.RyuApp):
                 next_hop, port = self.get_dijkstra_next_hop(dpid, dst_dpid)
                 if port:
                     out_port = port
-                    self.logger.info("Cross-switch communication: s%d->s%d (%s->%s)", 
-                                   dpid, dst_dpid, src[-5:], dst[-5:])
+                    if self.logger.isEnabledFor(logging.INFO):
+                        self.logger.info("Cross-switch communication: s%d->s%d (%s->%s)",
+                                         dpid, dst_dpid, src[-5:], dst[-5:])
 
-        # Default to flooding if no specific route found
+        # Default to flooding (via the loop-free flood group) if no route found
         if not out_port:
             out_port = ofproto.OFPP_FLOOD
-
-        actions = [parser.OFPActionOutput(out_port)]
+            actions = [parser.OFPActionGroup(FLOOD_GROUP_ID)]
+        else:
+            actions = [parser.OFPActionOutput(out_port)]
 
         # Install flow to avoid packet_in next time (avoid broadcasts)
         if (out_port != ofproto.OFPP_FLOOD and 
             not dst.startswith('ff:ff') and not dst.startswith('01:00')):
-            match = parser.OFPMatch(in_port=in_port, eth_dst=dst)
-            if msg.buffer_id != ofproto.OFP_NO_BUFFER:
-                self.add_flow(datapath, 10, match, actions, msg.buffer_id, 30)
+            match = self._match_for(parser, in_port, dst)
+            buffered = msg.buffer_id != ofproto.OFP_NO_BUFFER
+            self.add_flow(datapath, 10, match, actions,
+                          msg.buffer_id if buffered else None, 30)
+            if buffered:
+                # The FlowMod releases the buffered packet; no PacketOut needed
                 return
-            else:
-                self.add_flow(datapath, 10, match, actions, idle_timeout=30)
 
-        # Send packet out
+        # Send packet out (payload only when the switch kept no copy)
         data = None
         if msg.buffer_id == ofproto.OFP_NO_BUFFER:
             data = msg.data
@@ -263,34 +469,91 @@ class FinalDijkstraGraphController(app_manager.RyuApp):
                                  in_port=in_port, actions=actions, data=data)
         datapath.send_msg(out)
 
+    def hosts_on_switch(self, dpid):
+        """Column indices of the hosts attached to a switch"""
+        return [i for i, d in enumerate(self._host_dpids) if d == dpid]
+
+    def _match_for(self, parser, in_port, dst):
+        """Return a cached OFPMatch(in_port, eth_dst); all switches share OF1.3"""
+        key = (in_port, dst)
+        match = self._match_cache.get(key)
+        if match is None:
+            match = parser.OFPMatch(in_port=in_port, eth_dst=dst)
+            self._match_cache[key] = match
+            if len(self._match_cache) > self._match_cache_max:
+                self._match_cache.popitem(last=False)
+        else:
+            self._match_cache.move_to_end(key)
+        return match
+
     def _find_host_switch(self, mac):
         """Find which switch a host is connected to based on MAC"""
-        for ip, (host_mac, dpid, port) in self.host_db.items():
-            if host_mac == mac:
-                return dpid
-        return None
+        return self.mac_to_dpid.get(mac)
 
-    def send_arp_reply(self, datapath, port, arp_req, target_mac):
-        """Send ARP reply as proxy"""
+    def send_arp_reply(self, datapath, port, req_mac, req_ip, target_ip, target_mac):
+        """Send ARP reply as proxy (all addresses as raw bytes)"""
         parser = datapath.ofproto_parser
         ofproto = datapath.ofproto
         
-        # Build ARP reply
-        e = ethernet.ethernet(dst=arp_req.src_mac, src=target_mac,
-                             ethertype=ether_types.ETH_TYPE_ARP)
-        a = arp.arp(opcode=arp.ARP_REPLY,
-                   src_mac=target_mac, src_ip=arp_req.dst_ip,
-                   dst_mac=arp_req.src_mac, dst_ip=arp_req.src_ip)
+        # Build ARP reply: eth dst/src, then ARP sha/spa/tha/tpa at offset 22
+        frame = self._arp_template
+        struct.pack_into('!6s6s', frame, 0, req_mac, target_mac)
+        struct.pack_into('!6s4s6s4s', frame, 22, target_mac, target_ip, req_mac, req_ip)
         
-        p = packet.Packet()
-        p.add_protocol(e)
-        p.add_protocol(a)
-        p.serialize()
-        
-        # Send out
+        # Queue for the next flush; the first queued reply wakes the flush thread
         actions = [parser.OFPActionOutput(port)]
         out = parser.OFPPacketOut(datapath=datapath,
                                  buffer_id=ofproto.OFP_NO_BUFFER,
                                  in_port=ofproto.OFPP_CONTROLLER,
-                                 actions=actions, data=p.data)
-        datapath.send_msg(out)
\ No newline at end of file
+                                 actions=actions, data=bytes(frame))
+        datapath.set_xid(out)
+        out.serialize()
+        if not self._pending_out:
+            self._arp_flush_ready.set()
+        self._pending_out[datapath].append(out.buf)
+
+    def _arp_flush_loop(self):
+        """Write queued ARP replies once the packet-in handler yields"""
+        # Replies queued before this thread gets scheduled share one write
+        while True:
+            self._arp_flush_ready.wait()
+            self._arp_flush_ready.clear()
+            try:
+                self._flush_arp_replies()
+            except Exception:
+                self.logger.exception("Failed to flush proxy ARP replies")
+
+    def _flush_arp_replies(self):
+        """Send each datapath's queued PacketOuts as a single write"""
+        pending, self._pending_out = self._pending_out, defaultdict(list)
+        for datapath, bufs in pending.items():
+            datapath.send(b''.join(bufs))
+
+
+def _generate_next_hop():
+    """Recompute NEXT_HOP from TOPOLOGY_EDGES (offline, needs networkx)"""
+    import networkx as nx
+
+    G = nx.Graph()
+    G.add_nodes_from(range(1, 11))
+    for s1, s2, weight in TOPOLOGY_EDGES:
+        G.add_edge(s1, s2, weight=weight)
+
+    ports = {dpid: {neighbor: port for port, neighbor in enumerate(G.neighbors(dpid), 3)}
+             for dpid in G}
+    table = {}
+    for src, paths in nx.all_pairs_dijkstra_path(G, weight='weight'):
+        for dst, path in paths.items():
+            if len(path) > 1:
+                table[(src, dst)] = (path[1], ports[src][path[1]])
+    return table
+
+
+if __name__ == '__main__':
+    # Print a NEXT_HOP literal to paste back into this module
+    next_hop = _generate_next_hop()
+    print('NEXT_HOP = {')
+    for src in range(1, 11):
+        print('    ' + ' '.join('(%d, %d): (%d, %d),' % ((src, dst) + next_hop[(src, dst)])
+                                for dst in range(1, 11) if (src, dst) in next_hop))
+    print('}')
@@ -3,20 +3,22 @@
 Manual test for dual controllers - simplified version
 """
 
-import sys
-sys.path.extend([
-    '/usr/lib/python3/dist-packages',
-    '/usr/local/lib/python3.8/dist-packages',
-    '/usr/lib/python3.8/dist-packages'
-])
+from mininet_paths import add_mininet_paths
+add_mininet_paths()
 
 from mininet.net import Mininet
 from mininet.node import RemoteController
 from mininet.cli import CLI
 from mininet.log import setLogLevel, info
 from mininet.link import TCLink
+import os
+import sys
 import time
 
+# Shared ping helpers live next to the topology scripts
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'mininet'))
+from ping_utils import packet_loss
+
 def manual_test():
     """Simple manual test for dual controller connectivity"""
     
@@ -69,7 +71,7 @@ def manual_test():
     # Test 1: Primary domain
     info('[TEST] h1 -> h2 (primary domain)\n')
     result = h1.cmd('ping -c 2 10.0.0.2')
-    if '0% packet loss' in result:
+    if packet_loss(result) == 0:
         info('✓ Primary domain OK\n')
     
     # Test 2: Cross-domain (needs ARP)
@@ -77,7 +79,7 @@ def manual_test():
     h1.cmd('arp -s 10.0.0.11 00:00:00:00:00:0b')
     h11.cmd('arp -s 10.0.0.1 00:00:00:00:00:01')
     result = h1.cmd('ping -c 3 10.0.0.11')
-    if '0% packet loss' in result or '33% packet loss' in result:
+    if packet_loss(result) <= 33:
         info('✓ Cross-domain OK\n')
     
     info('\n*** Manual testing CLI\n')
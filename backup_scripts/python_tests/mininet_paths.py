@@ -0,0 +1,19 @@
+"""
+System Mininet paths shared by the python_tests scripts
+"""
+
+import sys
+
+# System dist-packages that hold Mininet
+MININET_PATHS = [
+    '/usr/lib/python3/dist-packages',
+    '/usr/local/lib/python3.8/dist-packages',
+    '/usr/lib/python3.8/dist-packages',
+]
+
+
+def add_mininet_paths():
+    """Append the system Mininet paths to sys.path, skipping ones already there"""
+    for p in MININET_PATHS:
+        if p not in sys.path:
+            sys.path.append(p)
@@ -7,11 +7,8 @@ import sys
 import os
 
 # Add system Python paths for Mininet access
-sys.path.extend([
-    '/usr/lib/python3/dist-packages',
-    '/usr/local/lib/python3.8/dist-packages',
-    '/usr/lib/python3.8/dist-packages'
-])
+from mininet_paths import add_mininet_paths
+add_mininet_paths()
 
 try:
     from mininet.net import Mininet
@@ -4,79 +4,80 @@ Verify dual controller topology structure
 Shows the network design without requiring actual execution
 """
 
+import sys
+
 def show_network_structure():
     """Display the dual controller network structure"""
     
-    print("=" * 60)
-    print("   DUAL CONTROLLER SDN NETWORK STRUCTURE")
-    print("=" * 60)
-    print()
+    # Collect every line and write once at the end
+    lines = []
+    add = lines.append
+    
+    add("=" * 60)
+    add("   DUAL CONTROLLER SDN NETWORK STRUCTURE")
+    add("=" * 60)
+    add("")
     
-    print("🏗️  TOPOLOGY OVERVIEW:")
-    print("   • 10 Switches (s1-s10)")
-    print("   • 20 Hosts (h1-h20, 2 per switch)")
-    print("   • 2 Controller domains with cross-domain links")
-    print()
+    add("🏗️  TOPOLOGY OVERVIEW:")
+    add("   • 10 Switches (s1-s10)")
+    add("   • 20 Hosts (h1-h20, 2 per switch)")
+    add("   • 2 Controller domains with cross-domain links")
+    add("")
     
-    print("🎛️  CONTROLLER DOMAINS:")
-    print("   Primary Controller (port 6633):")
-    print("     - Switches: s1, s2, s3, s4, s5")
-    print("     - Hosts: h1-h10")
-    print("     - Gateway switches: s3, s4, s5")
-    print()
-    print("   Secondary Controller (port 6634):")
-    print("     - Switches: s6, s7, s8, s9, s10") 
-    print("     - Hosts: h11-h20")
-    print("     - All switches can communicate with primary")
-    print()
+    add("🎛️  CONTROLLER DOMAINS:")
+    add("   Primary Controller (port 6633):")
+    add("     - Switches: s1, s2, s3, s4, s5")
+    add("     - Hosts: h1-h10")
+    add("     - Gateway switches: s3, s4, s5")
+    add("")
+    add("   Secondary Controller (port 6634):")
+    add("     - Switches: s6, s7, s8, s9, s10") 
+    add("     - Hosts: h11-h20")
+    add("     - All switches can communicate with primary")
+    add("")
     
-    print("🔗 NETWORK LINKS:")
-    print("   Primary Domain (s1-s5):")
-    print("     s1 ↔ s2   (backbone)")
-    print("     s1 ↔ s3   (backbone)")
-    print("     s2 ↔ s4   (branch)")
-    print("     s2 ↔ s5   (branch)")
-    print()
-    print("   Cross-Domain Gateways:")
-    print("     s3 ↔ s6   (primary→secondary)")
-    print("     s3 ↔ s7   (primary→secondary)")
-    print("     s4 ↔ s8   (primary→secondary)")
-    print("     s4 ↔ s9   (primary→secondary)")
-    print("     s5 ↔ s10  (primary→secondary)")
-    print()
-    print("   Secondary Domain (s6-s10):")
-    print("     s6 ↔ s7   (internal)")
-    print("     s8 ↔ s9   (internal)")
-    print()
+    add("🔗 NETWORK LINKS:")
+    add("   Primary Domain (s1-s5):")
+    add("     s1 ↔ s2   (backbone)")
+    add("     s1 ↔ s3   (backbone)")
+    add("     s2 ↔ s4   (branch)")
+    add("     s2 ↔ s5   (branch)")
+    add("")
+    add("   Cross-Domain Gateways:")
+    add("     s3 ↔ s6   (primary→secondary)")
+    add("     s3 ↔ s7   (primary→secondary)")
+    add("     s4 ↔ s8   (primary→secondary)")
+    add("     s4 ↔ s9   (primary→secondary)")
+    add("     s5 ↔ s10  (primary→secondary)")
+    add("")
+    add("   Secondary Domain (s6-s10):")
+    add("     s6 ↔ s7   (internal)")
+    add("     s8 ↔ s9   (internal)")
+    add("")
     
-    print("🖥️  HOST ASSIGNMENT:")
-    for i in range(1, 11):
-        switch = f"s{i}"
-        host_start = (i-1) * 2 + 1
-        host_end = i * 2
-        hosts = f"h{host_start}, h{host_end}"
-        domain = "Primary" if i <= 5 else "Secondary"
-        print(f"   {switch}: {hosts} ({domain})")
-    print()
+    add("🖥️  HOST ASSIGNMENT:")
+    lines.extend(f"   s{i}: h{2*i - 1}, h{2*i} ({'Primary' if i <= 5 else 'Secondary'})"
+                 for i in range(1, 11))
+    add("")
     
-    print("⚡ FAULT TOLERANCE FEATURES:")
-    print("   • Multiple paths between domains")
-    print("   • Alternative routing within primary domain")
-    print("   • Cross-domain gateway redundancy")
-    print("   • Link failure detection via PORT_STATUS")
-    print("   • Automatic rerouting with Dijkstra algorithm")
-    print()
+    add("⚡ FAULT TOLERANCE FEATURES:")
+    add("   • Multiple paths between domains")
+    add("   • Alternative routing within primary domain")
+    add("   • Cross-domain gateway redundancy")
+    add("   • Link failure detection via PORT_STATUS")
+    add("   • Automatic rerouting with Dijkstra algorithm")
+    add("")
     
-    print("🧪 TEST SCENARIOS:")
-    print("   1. Intra-domain communication (h1 ↔ h5)")
-    print("   2. Cross-domain communication (h1 ↔ h11)")
-    print("   3. Primary domain link failure (s1-s3)")
-    print("   4. Cross-domain link failure (s3-s6)")
-    print("   5. Multiple link failures")
-    print("   6. Link restoration and path recovery")
-    print()
+    add("🧪 TEST SCENARIOS:")
+    add("   1. Intra-domain communication (h1 ↔ h5)")
+    add("   2. Cross-domain communication (h1 ↔ h11)")
+    add("   3. Primary domain link failure (s1-s3)")
+    add("   4. Cross-domain link failure (s3-s6)")
+    add("   5. Multiple link failures")
+    add("   6. Link restoration and path recovery")
+    add("")
     
-    print("📁 ESSENTIAL FILES:")
+    add("📁 ESSENTIAL FILES:")
     files = [
         ("demo_all.sh", "Complete automated demonstration"),
         ("start_dual_controllers.sh", "Start both controllers"),
@@ -86,20 +87,21 @@ def show_network_structure():
         ("mininet/dijkstra_graph_topo.py", "Network topology definition")
     ]
     
-    for filename, description in files:
-        print(f"   • {filename:<35} - {description}")
-    print()
+    lines.extend(f"   • {filename:<35} - {description}" for filename, description in files)
+    add("")
+    
+    add("🚀 USAGE:")
+    add("   ./demo_all.sh                    # Run complete demo")
+    add("   ./start_dual_controllers.sh      # Start controllers only")
+    add("   tmux attach -t dual_controllers:0 # View primary logs")
+    add("   tmux attach -t dual_controllers:1 # View secondary logs")
+    add("")
     
-    print("🚀 USAGE:")
-    print("   ./demo_all.sh                    # Run complete demo")
-    print("   ./start_dual_controllers.sh      # Start controllers only")
-    print("   tmux attach -t dual_controllers:0 # View primary logs")
-    print("   tmux attach -t dual_controllers:1 # View secondary logs")
-    print()
+    add("=" * 60)
+    add("   STRUCTURE VERIFICATION COMPLETE ✅")
+    add("=" * 60)
     
-    print("=" * 60)
-    print("   STRUCTURE VERIFICATION COMPLETE ✅")
-    print("=" * 60)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     show_network_structure()
\ No newline at end of file
@@ -8,7 +8,7 @@ import argparse
 from mininet.net import Mininet
 from mininet.node import RemoteController, OVSKernelSwitch
 from mininet.cli import CLI
-from mininet.link import TCLink
+from mininet.link import Link
 from mininet.log import setLogLevel, info
 
 def create_diamond_topology(controller_port=6633):
@@ -17,7 +17,7 @@ def create_diamond_topology(controller_port=6633):
     net = Mininet(
         controller=RemoteController,
         switch=OVSKernelSwitch,
-        link=TCLink,
+        link=Link,  # no bw/delay shaping, so skip TCLink's per-interface tc calls
         autoSetMacs=True
     )
     
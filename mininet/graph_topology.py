@@ -10,10 +10,48 @@ import argparse
 from mininet.net import Mininet
 from mininet.node import RemoteController, OVSKernelSwitch
 from mininet.cli import CLI
-from mininet.link import TCLink
-from mininet.log import setLogLevel, info
+from mininet.link import Link
+from mininet.log import setLogLevel, info, debug
 # import networkx as nx  # Not needed for this topology
 import random
+from ping_utils import packet_loss, run_pings
+
+# Static topology tables, built once at import. Per-item progress lines
+# go to debug() so the default info level only prints the section headers.
+
+# (name, dpid) for s1..s10
+SWITCHES = tuple((f's{i}', f'{i:016x}') for i in range(1, 11))
+
+# (name, ip, mac, switch index, switch port): 2 hosts per switch on ports 1-2
+HOSTS = tuple(
+    (f'h{2*(s-1) + p}', f'10.0.{s}.{p}', f'00:00:00:00:{s:02x}:{p:02x}', s - 1, p)
+    for s in range(1, 11) for p in (1, 2)
+)
+
+# (switch index, switch index, port1, port2)
+# Ring topology first (ensures basic connectivity)
+RING_LINKS = tuple((i, (i + 1) % 10, 10 + i, 20 + i) for i in range(10))
+
+# Cross-connections for redundancy
+CROSS_LINKS = (
+    (0, 2, 30, 30),  # s1 <-> s3
+    (0, 4, 31, 31),  # s1 <-> s5
+    (0, 5, 32, 32),  # s1 <-> s6
+    (1, 3, 33, 33),  # s2 <-> s4
+    (1, 6, 34, 34),  # s2 <-> s7
+    (2, 5, 35, 35),  # s3 <-> s6
+    (2, 7, 36, 36),  # s3 <-> s8
+    (3, 6, 37, 37),  # s4 <-> s7
+    (3, 8, 38, 38),  # s4 <-> s9
+    (4, 7, 39, 39),  # s5 <-> s8
+    (4, 9, 40, 40),  # s5 <-> s10
+    (5, 8, 41, 41),  # s6 <-> s9
+    (6, 9, 42, 42),  # s7 <-> s10
+    (7, 9, 43, 43),  # s8 <-> s10
+    (8, 0, 44, 44),  # s9 <-> s1 (close the mesh)
+)
+
+ALL_SW_LINKS = RING_LINKS + CROSS_LINKS
 
 def create_graph_topology(controller_port=6633):
     """Create a complex graph topology with 10 switches and 20 hosts"""
@@ -21,7 +59,7 @@ def create_graph_topology(controller_port=6633):
     net = Mininet(
         controller=RemoteController,
         switch=OVSKernelSwitch,
-        link=TCLink,
+        link=Link,  # no bw/delay shaping, so skip TCLink's per-interface tc calls
         autoSetMacs=True
     )
     
@@ -37,65 +75,24 @@ def create_graph_topology(controller_port=6633):
     
     # Add 10 switches
     info("*** Adding 10 switches\n")
-    switches = []
-    for i in range(1, 11):
-        sw = net.addSwitch(f's{i}', dpid=f'{i:016x}')
-        switches.append(sw)
-        info(f"  Added switch s{i}\n")
+    switches = [net.addSwitch(name, dpid=dpid) for name, dpid in SWITCHES]
+    debug(''.join(f"  Added switch {name}\n" for name, _ in SWITCHES))
     
     # Add 20 hosts (2 per switch)
     info("\n*** Adding 20 hosts (2 per switch)\n")
     hosts = []
-    host_num = 1
-    for i, sw in enumerate(switches, 1):
-        # Add 2 hosts per switch
-        for j in range(2):
-            ip = f'10.0.{i}.{j+1}'
-            mac = f'00:00:00:00:{i:02x}:{j+1:02x}'
-            h = net.addHost(f'h{host_num}', ip=ip, mac=mac)
-            hosts.append(h)
-            # Connect host to switch
-            net.addLink(h, sw, port1=1, port2=(j+1))
-            info(f"  h{host_num} ({ip}) -> s{i}\n")
-            host_num += 1
-    
-    # Create mesh-like connections between switches
+    for name, ip, mac, sw, port in HOSTS:
+        h = net.addHost(name, ip=ip, mac=mac)
+        hosts.append(h)
+        # Connect host to switch
+        net.addLink(h, switches[sw], port1=1, port2=port)
+        debug(f"  {name} ({ip}) -> s{sw+1}\n")
+    
+    # Ring backbone followed by cross-connections, see ALL_SW_LINKS
     info("\n*** Creating mesh topology between switches\n")
-    
-    # Create a more structured mesh with guaranteed connectivity
-    # Ring topology first (ensures basic connectivity)
-    info("  Creating ring backbone:\n")
-    for i in range(10):
-        s1 = switches[i]
-        s2 = switches[(i + 1) % 10]
-        port1 = 10 + i
-        port2 = 20 + i
-        net.addLink(s1, s2, port1=port1, port2=port2)
-        info(f"    s{i+1} <-> s{((i+1)%10)+1}\n")
-    
-    # Add cross-connections for redundancy
-    info("  Adding cross-connections:\n")
-    cross_links = [
-        (0, 2, 30, 30),  # s1 <-> s3
-        (0, 4, 31, 31),  # s1 <-> s5
-        (0, 5, 32, 32),  # s1 <-> s6
-        (1, 3, 33, 33),  # s2 <-> s4
-        (1, 6, 34, 34),  # s2 <-> s7
-        (2, 5, 35, 35),  # s3 <-> s6
-        (2, 7, 36, 36),  # s3 <-> s8
-        (3, 6, 37, 37),  # s4 <-> s7
-        (3, 8, 38, 38),  # s4 <-> s9
-        (4, 7, 39, 39),  # s5 <-> s8
-        (4, 9, 40, 40),  # s5 <-> s10
-        (5, 8, 41, 41),  # s6 <-> s9
-        (6, 9, 42, 42),  # s7 <-> s10
-        (7, 9, 43, 43),  # s8 <-> s10
-        (8, 0, 44, 44),  # s9 <-> s1 (close the mesh)
-    ]
-    
-    for s1_idx, s2_idx, port1, port2 in cross_links:
+    for s1_idx, s2_idx, port1, port2 in ALL_SW_LINKS:
         net.addLink(switches[s1_idx], switches[s2_idx], port1=port1, port2=port2)
-        info(f"    s{s1_idx+1} <-> s{s2_idx+1}\n")
+        debug(f"    s{s1_idx+1} <-> s{s2_idx+1}\n")
     
     return net, hosts, switches
 
@@ -103,29 +100,20 @@ def test_basic_connectivity(net, hosts):
     """Test connectivity between various host pairs"""
     info("\n*** Testing Basic Connectivity\n")
     
-    # Test between hosts on same switch
-    info("  Testing hosts on same switch (h1 -> h2):\n")
-    result = hosts[0].cmd(f'ping -c 3 -W 1 {hosts[1].IP()}')
-    if '0% packet loss' in result:
-        info("    ✅ Same switch: Connected\n")
-    else:
-        info("    ❌ Same switch: Failed\n")
-    
-    # Test between hosts on adjacent switches
-    info("  Testing hosts on adjacent switches (h1 -> h3):\n")
-    result = hosts[0].cmd(f'ping -c 3 -W 1 {hosts[2].IP()}')
-    if '0% packet loss' in result:
-        info("    ✅ Adjacent switches: Connected\n")
-    else:
-        info("    ❌ Adjacent switches: Failed\n")
+    # Same switch, adjacent switches, far switches - all pinged at once
+    checks = [
+        ("same switch (h1 -> h2)", "Same switch", hosts[1]),
+        ("adjacent switches (h1 -> h3)", "Adjacent switches", hosts[2]),
+        ("far switches (h1 -> h19)", "Far switches", hosts[18]),
+    ]
+    results = run_pings([(hosts[0], dst.IP()) for _, _, dst in checks], count=3)
     
-    # Test between hosts on far switches
-    info("  Testing hosts on far switches (h1 -> h19):\n")
-    result = hosts[0].cmd(f'ping -c 3 -W 1 {hosts[18].IP()}')
-    if '0% packet loss' in result:
-        info("    ✅ Far switches: Connected\n")
-    else:
-        info("    ❌ Far switches: Failed\n")
+    for (where, name, _), result in zip(checks, results):
+        info(f"  Testing hosts on {where}:\n")
+        if packet_loss(result) == 0:
+            info(f"    ✅ {name}: Connected\n")
+        else:
+            info(f"    ❌ {name}: Failed\n")
 
 def test_all_pairs_sample(net, hosts):
     """Test connectivity between sample host pairs"""
@@ -140,14 +128,16 @@ def test_all_pairs_sample(net, hosts):
         (11, 20), # h11 -> h20
     ]
     
+    results = run_pings([(hosts[src-1], hosts[dst-1].IP()) for src, dst in test_pairs],
+                        count=2)
+    
     success = 0
-    for src, dst in test_pairs:
+    for (src, dst), result in zip(test_pairs, results):
         src_host = hosts[src-1]
         dst_host = hosts[dst-1]
         info(f"  Testing h{src} ({src_host.IP()}) -> h{dst} ({dst_host.IP()}): ")
         
-        result = src_host.cmd(f'ping -c 2 -W 1 {dst_host.IP()}')
-        if '0% packet loss' in result:
+        if packet_loss(result) == 0:
             info("✅\n")
             success += 1
         else:
@@ -176,7 +166,7 @@ def test_link_failure(net, hosts, switches):
     
     # Check if still connected
     result = hosts[0].cmd(f'ping -c 3 -W 1 {hosts[19].IP()}')
-    if '0% packet loss' in result:
+    if packet_loss(result) == 0:
         info("    ✅ Rerouting successful!\n")
     else:
         info("    ⚠️  Some packet loss during rerouting\n")
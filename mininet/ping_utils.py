@@ -0,0 +1,31 @@
+"""
+Ping helpers shared by the topology and test scripts
+"""
+
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on concurrent ping processes
+MAX_PING_WORKERS = 32
+
+# Matches the whole number, so "100% packet loss" is never read as 0%
+_LOSS_RE = re.compile(r'(\d+)% packet loss')
+
+def packet_loss(result):
+    """Packet loss percentage from ping output (100 if ping printed no summary)"""
+    m = _LOSS_RE.search(result)
+    return int(m.group(1)) if m else 100
+
+def run_pings(probes, count=3):
+    """Ping every (host, ip) probe concurrently; outputs come back in order.
+    Each ping gets its own popen() since host.cmd() serializes on one shell."""
+    def ping(probe):
+        host, ip = probe
+        proc = host.popen(['ping', '-c', str(count), '-W', '1', ip],
+                          stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return proc.communicate()[0].decode(errors='replace')
+    if not probes:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(probes), MAX_PING_WORKERS)) as ex:
+        return list(ex.map(ping, probes))
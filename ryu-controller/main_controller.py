@@ -231,7 +231,7 @@ class MainDijkstraController(app_manager.RyuApp):
         
         # Parse packet
         pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        eth = pkt.get_protocol(ethernet.ethernet)
         
         # Skip LLDP and IPv6
         if eth.ethertype == ether_types.ETH_TYPE_LLDP or eth.ethertype == 0x86dd:
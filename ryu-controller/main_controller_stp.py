@@ -284,7 +284,7 @@ class MainDijkstraControllerSTP(app_manager.RyuApp):
         
         # Parse packet first to check type
         pkt = packet.Packet(msg.data)
-        eth = pkt.get_protocols(ethernet.ethernet)[0]
+        eth = pkt.get_protocol(ethernet.ethernet)
         
         # Skip LLDP and IPv6 silently (even on blocked ports)
         if eth.ethertype == ether_types.ETH_TYPE_LLDP or eth.ethertype == 0x86dd: